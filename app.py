@@ -4,7 +4,10 @@ from components.sidebar import render_sidebar
 from components.dashboard import render_dashboard
 from components.qa_section import render_qa_section
 from utils.analyzer import AdvancedDependencyAnalyzer
+from utils.analysis_store import AnalysisHandle, analysis_key, scratch_store, GRAPH_ARTIFACTS
+from utils.dependency_graph import project_graph
 from utils.session_state import initialize_session_state
+from utils.task_graph import TaskGraph, STATUS_ICONS
 
 # Set page configuration
 st.set_page_config(page_title="Code Compass", layout="wide")
@@ -25,7 +28,9 @@ if config['analyze_button'] and config['repo_url']:
     # Reset analysis state
     st.session_state.repo_analyzed = False
     
-    analyzer = AdvancedDependencyAnalyzer(config['aiml_api_key'], config['google_api_key'])
+    analyzer = AdvancedDependencyAnalyzer(config['aiml_api_key'], config['google_api_key'],
+                                          embedding_backend=config['embedding_backend'],
+                                          ai_deps_mode=config['ai_deps_mode'])
     st.session_state.analyzer = analyzer
     
     username, repo_name = analyzer.extract_repo_info(config['repo_url'])
@@ -33,38 +38,164 @@ if config['analyze_button'] and config['repo_url']:
     if not username or not repo_name:
         st.error("❌ Invalid GitHub repository URL")
     else:
-        with st.spinner("📦 Cloning and processing repository..."):
-            st.session_state.repo_path = analyzer.clone_repo(config['repo_url'])
-            vectorstore_built = analyzer.build_vectorstore(st.session_state.repo_path)
-            if vectorstore_built:
-                st.session_state.vectorstore = True
-        
-        if st.session_state.vectorstore:
-            with st.spinner("🔍 Generating contribution opportunities..."):
-                st.session_state.contribution_report = analyzer.generate_contribution_report()
-                st.session_state.repo_summary = analyzer.summarize_repo(st.session_state.contribution_report)
+        st.session_state.vectorstore = None
+        st.session_state.repo_path = None
+        st.session_state.graph_focus = None
+        commit = analyzer.get_remote_head(config['repo_url'])
+        if commit:
+            analyzer.use_index(username, repo_name, commit)
+        index_reused = analyzer.has_index()
+        
+        # Results are shared per repo@commit, graphs per repo@commit and build settings; without
+        # a commit nothing can be reused, so the analysis lives in a private store that goes
+        # away with the session
+        graph_settings = analyzer.graph_settings()
+        if commit:
+            analysis = AnalysisHandle(analysis_key(username, repo_name, commit), graph_settings=graph_settings)
+        else:
+            analysis = AnalysisHandle(analysis_key(username, repo_name, "unversioned"), store=scratch_store(),
+                                      graph_settings=graph_settings)
+        st.session_state.analysis = analysis
+        cached = analysis.names()
+        need_graph = not GRAPH_ARTIFACTS <= cached
+        if not need_graph and analysis.get("graph_settings") != graph_settings:
+            print(f"🔁 Stored graph for {analysis.graph_key} is incomplete, rebuilding")
+            need_graph = True
+        if not need_graph:
+            print(f"♻️ Reusing stored analysis for {analysis.graph_key}")
+        
+        options = {
+            "show_function_calls": config['show_function_calls'],
+            "show_imports": config['show_imports'],
+            "show_file_links": config['show_file_links'],
+            "show_folder_structure": config['show_folder_structure'],
+            "min_connections": config['min_connections']
+        }
+        
+        def clone(task):
+            task.report("Cloning repository...")
+            try:
+                return analyzer.clone_repo(config['repo_url'], commit)
+            except Exception as e:
+                # Files can still be read over the GitHub API; only the index needs a checkout
+                print(f"⚠️ Clone failed ({e}), falling back to the GitHub API")
+                task.report("Clone failed, using the GitHub API")
+                return None
+        
+        def build_index(task, repo_path=None):
+            if index_reused:
+                # This commit was already indexed with the same embedding model
+                print(f"♻️ Reusing index for {username}/{repo_name}@{commit[:12]}")
+                task.report("Reusing existing index")
+                return True
+            if not repo_path:
+                raise RuntimeError("the repository could not be cloned")
+            if not commit:
+                analyzer.use_index(username, repo_name, analyzer.get_repo_commit(repo_path))
             
-            with st.spinner("📦 Fetching repository files for graph..."):
-                files, repo_structure = analyzer.get_repo_contents(username, repo_name, config['github_token'])
-                st.session_state.files_data = files
-                st.session_state.repo_structure_data = repo_structure
+            def show_progress(done, total):
+                task.report(f"Embedded {done}/{total} files")
             
-            if files:
-                options = {
-                    "show_function_calls": config['show_function_calls'],
-                    "show_imports": config['show_imports'],
-                    "show_file_links": config['show_file_links'],
-                    "show_folder_structure": config['show_folder_structure'],
-                    "min_connections": config['min_connections']
-                }
-                
-                with st.spinner("🔍 Analyzing dependencies..."):
-                    graph, file_dependencies = analyzer.create_dependency_graph(files, repo_structure, options)
-                    st.session_state.graph_data = graph
-                    st.session_state.file_dependencies_data = file_dependencies
-                
-                st.session_state.repo_analyzed = True
-                st.success("✅ Repository analysis completed!")
+            if not analyzer.build_vectorstore(repo_path, progress=show_progress):
+                raise RuntimeError("vector store could not be built")
+            return True
+        
+        def read_files(task, repo_path):
+            task.report("Reading repository files...")
+            if repo_path and os.path.isdir(repo_path):
+                return analyzer.get_local_repo_contents(repo_path)
+            
+            def show_progress(done, total):
+                task.report(f"Downloaded {done}/{total} files")
+            
+            return analyzer.get_repo_contents(username, repo_name, config['github_token'],
+                                              ref=commit, progress=show_progress)
+        
+        def build_graph(task, contents):
+            files, repo_structure = contents
+            if not files:
+                return None
+            task.report(f"Extracting dependencies from {len(files)} files...")
+            full_graph, file_dependencies = analyzer.build_full_dependency_graph(files, repo_structure)
+            task.report("Saving analysis...")
+            analysis.put_files(files)
+            analysis.put("repo_structure", repo_structure)
+            analysis.put("file_dependencies", file_dependencies)
+            analysis.put("full_graph", full_graph)
+            # Without matching settings a partial download is rebuilt on the next run instead of reused
+            analysis.put("graph_settings", None if repo_structure.get("incomplete") else graph_settings)
+            analysis.store.evict_lru(keep={analysis.key, analysis.graph_key})
+            return full_graph
+        
+        # LLM sections that failed; the dashboard offers a retry instead of calling again on every rerun
+        llm_failures = {}
+        
+        def contribution_report(task, _):
+            errors = []
+            report = task.stream(analyzer.generate_contribution_report_stream(errors))
+            if errors:
+                llm_failures["contribution_report"] = errors[0]
+                raise RuntimeError(errors[0])
+            if analyzer.openai_client:
+                analysis.put("contribution_report", report)
+            return report
+        
+        def repo_summary(task, report=None):
+            errors = []
+            summary = task.stream(analyzer.summarize_repo_stream(report or analysis.get("contribution_report"), errors))
+            if errors:
+                llm_failures["repo_summary"] = errors[0]
+                raise RuntimeError(errors[0])
+            if analyzer.openai_client:
+                analysis.put("repo_summary", summary)
+            return summary
+        
+        # Graph ingestion never waits for the index or the LLM, so the two branches overlap.
+        # Stages whose results are already stored for this commit are left out entirely.
+        pipeline = TaskGraph(max_workers=4)
+        if need_graph or not index_reused:
+            pipeline.add("clone", clone, label="📦 Clone repository")
+        pipeline.add("index", build_index, deps=[] if index_reused else ["clone"], label="🧱 Build vector index")
+        if need_graph:
+            pipeline.add("files", read_files, deps=["clone"], label="📂 Read repository files")
+            pipeline.add("graph", build_graph, deps=["files"], label="🔍 Analyze dependencies")
+        if "contribution_report" not in cached:
+            pipeline.add("report", contribution_report, deps=["index"], label="🚀 Contribution report")
+        if "repo_summary" not in cached:
+            pipeline.add("summary", repo_summary, deps=["report"] if "report" in pipeline.tasks else [],
+                         label="📋 Repository summary")
+        
+        with st.status("🔄 Analyzing repository...", expanded=True) as status_box:
+            status_lines = st.empty()
+            live_text = st.empty()
+        
+        def show_status(graph):
+            status_lines.markdown("\n\n".join(
+                f"{STATUS_ICONS[task.status]} **{task.label}** — {task.detail or task.status} ({task.elapsed:.1f}s)"
+                for task in graph.tasks.values()
+            ))
+            streaming = [task for task in graph.tasks.values() if task.status == "running" and task.output]
+            if streaming:
+                live_text.markdown("".join(streaming[-1].output))
+        
+        results = pipeline.run(on_update=show_status)
+        live_text.empty()
+        
+        failed = [task for task in pipeline.tasks.values() if task.status == "failed"]
+        for task in failed:
+            st.error(f"❌ {task.label} failed: {task.error}")
+        status_box.update(label="⚠️ Analysis finished with errors" if failed else "✅ Analysis finished",
+                          state="error" if failed else "complete", expanded=False)
+        
+        st.session_state.repo_path = results.get("clone")
+        st.session_state.vectorstore = results.get("index")
+        st.session_state.llm_failures = llm_failures
+        
+        full_graph = analysis.get("full_graph")
+        if full_graph is not None:
+            st.session_state.graph_data = project_graph(full_graph, options)
+            st.session_state.repo_analyzed = True
+            st.success("✅ Repository analysis completed!")
 
 # Render main dashboard
 render_dashboard(config)
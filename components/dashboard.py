@@ -1,10 +1,20 @@
 import streamlit as st
 import os
+import math
+from utils.dependency_graph import project_graph, aggregate_graph
+from utils.summary_job import FileSummaryJob
 from utils.visualization import create_enhanced_visualization, create_statistics_dashboard
 
+SUMMARY_PAGE_SIZE = 20
+# Above this many file nodes the "auto" detail level switches to the directory view
+LOD_MAX_NODES = int(os.environ.get("LOD_MAX_NODES", "500"))
+SUMMARY_REFRESH_SECONDS = 2
+
 def update_visualization(config):
     """Update visualization when filters change without re-analyzing the repository"""
-    if st.session_state.repo_analyzed and st.session_state.files_data is not None:
+    analysis = st.session_state.analysis
+    full_graph = analysis.get("full_graph") if analysis else None
+    if st.session_state.repo_analyzed and full_graph is not None:
         options = {
             "show_function_calls": config['show_function_calls'],
             "show_imports": config['show_imports'],
@@ -14,17 +24,45 @@ def update_visualization(config):
         }
         
         with st.spinner("🎨 Updating visualization..."):
-            graph, file_dependencies = st.session_state.analyzer.create_dependency_graph(
-                st.session_state.files_data, 
-                st.session_state.repo_structure_data, 
-                options
-            )
+            # Filters only project the cached superset graph; no re-extraction
+            graph = project_graph(full_graph, options)
+            file_dependencies = analysis.get("file_dependencies")
             st.session_state.graph_data = graph
-            st.session_state.file_dependencies_data = file_dependencies
             
-            html_content = create_enhanced_visualization(graph, config['layout_type'])
-            return html_content, graph, file_dependencies
-    return None, None, None
+            # Large graphs are drawn as directory aggregates so the browser gets a bounded element count
+            aggregated = config['graph_detail'] == "directories" or (
+                config['graph_detail'] == "auto" and graph.number_of_nodes() > LOD_MAX_NODES)
+            focus = st.session_state.graph_focus if aggregated else None
+            view = aggregate_graph(graph, focus, max_nodes=LOD_MAX_NODES) if aggregated else graph
+            
+            html_content = create_enhanced_visualization(
+                view, config['layout_type'], config['physics'],
+                cache_key=(tuple(sorted(options.items())), aggregated, focus))
+            return html_content, graph, file_dependencies, view if aggregated else None
+    return None, None, None, None
+
+def _expand_directory():
+    directory = st.session_state.graph_expand
+    if directory:
+        st.session_state.graph_focus = directory
+    st.session_state.graph_expand = None
+
+def _collapse_directory():
+    focus = st.session_state.graph_focus
+    st.session_state.graph_focus = (os.path.dirname(focus) or None) if focus else None
+
+def render_graph_focus(view):
+    """Drill-down controls for the directory-level graph"""
+    directories = sorted(data["directory"] for _, data in view.nodes(data=True)
+                         if data.get("node_type") == "aggregate" and data.get("directory"))
+    focus = st.session_state.graph_focus
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.selectbox(f"📂 Expand a directory (showing files in: {focus or 'repository root'})",
+                     [None] + directories, key="graph_expand", on_change=_expand_directory,
+                     format_func=lambda d: "—" if d is None else d)
+    with col2:
+        st.button("⬆️ Up one level", disabled=not focus, on_click=_collapse_directory)
 
 def render_dashboard(config):
     """Render the main dashboard with visualization and reports"""
@@ -32,41 +70,126 @@ def render_dashboard(config):
     if st.session_state.repo_analyzed and st.session_state.graph_data is not None:
         
         # Check if visualization needs to be updated due to filter changes
-        html_content, graph, file_dependencies = update_visualization(config)
+        html_content, graph, file_dependencies, view = update_visualization(config)
         if html_content:
             st.subheader("🌐 Interactive Repository Graph")
+            if view is not None:
+                render_graph_focus(view)
             st.components.v1.html(html_content, height=850)
             
             create_statistics_dashboard(graph, file_dependencies)
         else:
             # Use cached data
             with st.spinner("🎨 Creating visualization..."):
-                html_content = create_enhanced_visualization(st.session_state.graph_data, config['layout_type'])
+                html_content = create_enhanced_visualization(st.session_state.graph_data, config['layout_type'],
+                                                             config['physics'])
             
             st.subheader("🌐 Interactive Repository Graph")
             st.components.v1.html(html_content, height=850)
             
-            create_statistics_dashboard(st.session_state.graph_data, st.session_state.file_dependencies_data)
+            create_statistics_dashboard(st.session_state.graph_data, st.session_state.analysis.get("file_dependencies"))
         
         # Repository Summary and Contribution Report
-        if st.session_state.repo_summary:
-            st.subheader("📋 Repository Summary")
-            st.write(st.session_state.repo_summary)
+        analyzer = st.session_state.analyzer
+        analysis = st.session_state.analysis
+        summary_section = st.container()
+        report_section = st.container()
         
-        if st.session_state.contribution_report:
+        with report_section:
             st.subheader("🚀 Contribution Opportunities")
-            st.write(st.session_state.contribution_report)
+            report = analysis.get("contribution_report")
+            if report is None and analyzer and st.session_state.vectorstore:
+                # Normally produced during analysis; streamed here if that stage did not finish
+                report = render_llm_section("contribution_report", "Contribution report",
+                                            analyzer.generate_contribution_report_stream)
+            elif report:
+                st.write(report)
+        
+        with summary_section:
+            st.subheader("📋 Repository Summary")
+            summary = analysis.get("repo_summary")
+            if summary is None and analyzer and report and analyzer.openai_client:
+                render_llm_section("repo_summary", "Repository summary",
+                                   lambda errors: analyzer.summarize_repo_stream(report, errors))
+            elif summary:
+                st.write(summary)
         
-        # File Summaries (only show first few to avoid clutter)
-        if st.session_state.files_data and st.session_state.analyzer:
+        # File Summaries, produced in the background and paged
+        if analysis.has("files") and st.session_state.analyzer:
             with st.expander("📄 File Summaries (Click to expand)"):
-                for i, file in enumerate(st.session_state.files_data[:20]):  # Limit to first 20 files
-                    if file["content"] and file["path"] not in st.session_state.file_summaries:
-                        summary = st.session_state.analyzer.summarize_file(file["path"], file["content"])
-                        st.session_state.file_summaries[file["path"]] = summary
-                    
-                    if file["path"] in st.session_state.file_summaries:
-                        st.write(f"**{file['path']}**: {st.session_state.file_summaries[file['path']]}")
-                
-                if len(st.session_state.files_data) > 20:
-                    st.info(f"Showing first 20 files. Total files: {len(st.session_state.files_data)}")
\ No newline at end of file
+                if not st.session_state.analyzer.openai_client:
+                    st.info("AIML API key required for file summaries.")
+                else:
+                    # Queue the current page here so polling is on from the first render; the fragment
+                    # polls the background job only while this page waits on it
+                    page = st.session_state.get("file_summary_page", 1)
+                    polling = queue_summary_page(summary_job(), summary_page_files(analysis.files, page))
+                    st.fragment(render_file_summaries, run_every=SUMMARY_REFRESH_SECONDS if polling else None)(polling)
+
+def render_llm_section(name, label, make_stream):
+    """Stream a missing LLM section and store it; after a failure, wait for an explicit retry"""
+    failures = st.session_state.llm_failures
+    if name in failures:
+        st.warning(f"⚠️ {label} failed: {failures[name]}")
+        if not st.button(f"🔄 Retry {label.lower()}", key=f"retry_{name}"):
+            return None
+        del failures[name]
+    
+    errors = []
+    text = st.write_stream(make_stream(errors))
+    if errors:
+        failures[name] = errors[0]
+        return None
+    if st.session_state.analyzer.openai_client:
+        st.session_state.analysis.put(name, text)
+    return text
+
+def summary_job():
+    """The session's FileSummaryJob for the current analyzer"""
+    analyzer = st.session_state.analyzer
+    job = st.session_state.summary_job
+    if job is None or job.analyzer is not analyzer:
+        job = FileSummaryJob(analyzer)
+        st.session_state.summary_job = job
+    return job
+
+def summary_page_files(files, page):
+    return [f for f in files[(page - 1) * SUMMARY_PAGE_SIZE:page * SUMMARY_PAGE_SIZE] if f["content"]]
+
+def queue_summary_page(job, page_files):
+    """Submit the page's files that have no summary yet; True while any of them is pending"""
+    missing = [(f["path"], f["content"]) for f in page_files if job.lookup(f["path"], f["content"]) is None]
+    job.submit(missing)
+    with job.lock:
+        return any(f["path"] in job.pending for f in page_files)
+
+def render_file_summaries(polling):
+    """Render one page of file summaries from the cache and queue the missing ones
+
+    `polling` is whether this fragment was started with a refresh interval. When the page
+    starts or stops waiting on the background job, the app reruns to switch polling on or off.
+    """
+    job = summary_job()
+    files = st.session_state.analysis.files
+    total_pages = math.ceil(len(files) / SUMMARY_PAGE_SIZE)
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1,
+                               key="file_summary_page")
+    page_files = summary_page_files(files, page)
+    waiting = queue_summary_page(job, page_files)
+    
+    for file in page_files:
+        summary = job.results.get(file["path"])
+        if summary:
+            st.write(f"**{file['path']}**: {summary}")
+        elif file["path"] in job.failed:
+            st.write(f"**{file['path']}**: _summary unavailable_")
+        else:
+            st.write(f"**{file['path']}**: ⏳ summarizing...")
+    
+    st.caption(f"Showing files {(page - 1) * SUMMARY_PAGE_SIZE + 1}-{min(page * SUMMARY_PAGE_SIZE, len(files))} "
+               f"of {len(files)}")
+    
+    if waiting != polling:
+        st.rerun(scope="app")
@@ -15,20 +15,19 @@ def render_qa_section():
         
         # Submit button for questions
         if st.button("💡 Get Answer") and question:
+            st.subheader("🤖 Answer")
             with st.spinner("🔍 Searching through code and generating answer..."):
-                answer = st.session_state.analyzer.answer_question(question)
-                
-                st.subheader("🤖 Answer")
-                st.write(answer)
-                
-                # Add to chat history
-                if 'qa_history' not in st.session_state:
-                    st.session_state.qa_history = []
-                
-                st.session_state.qa_history.append({
-                    'question': question,
-                    'answer': answer
-                })
+                # Render tokens as they arrive; write_stream returns the full text
+                answer = st.write_stream(st.session_state.analyzer.answer_question_stream(question))
+            
+            # Add to chat history
+            if 'qa_history' not in st.session_state:
+                st.session_state.qa_history = []
+            
+            st.session_state.qa_history.append({
+                'question': question,
+                'answer': answer
+            })
         
         # Display recent Q&A history
         if st.session_state.qa_history:
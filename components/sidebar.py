@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.embeddings import EMBEDDING_BACKENDS
 
 def render_sidebar():
     """Render sidebar and return configuration"""
@@ -7,10 +8,18 @@ def render_sidebar():
         repo_url = st.text_input("GitHub Repository URL", placeholder="https://github.com/username/repository")
         github_token = st.text_input("GitHub Token (Optional)", type="password", help="For higher rate limits")
         aiml_api_key = st.text_input("AIML API Key", type="password", help="For GPT-5 powered analysis and Q&A")
-        google_api_key = st.text_input("Google API Key", type="password", help="For embeddings (required for RAG)")
+        google_api_key = st.text_input("Google API Key", type="password", help="For Google embeddings (RAG)")
+        embedding_backend = st.selectbox("Embedding Backend", EMBEDDING_BACKENDS,
+                                         help="auto uses Google when a key is set, otherwise the offline local backend")
+        ai_deps_mode = st.selectbox("AI Dependency Analysis", ["adaptive", "all", "off"],
+                                    help="adaptive only sends files static analysis could not handle to the LLM")
         
         st.header("🎨 Visualization Options")
         layout_type = st.selectbox("Graph Layout", ["spring", "kamada_kawai", "circular", "shell", "random"])
+        graph_detail = st.selectbox("Graph Detail", ["auto", "files", "directories"],
+                                    help="auto collapses directories into aggregate nodes on large repositories")
+        physics = st.checkbox("Live Physics Simulation", value=False,
+                              help="Let the browser keep moving nodes (small graphs only); otherwise positions are fixed")
         show_function_calls = st.checkbox("Show Function Calls", value=True)
         show_imports = st.checkbox("Show Imports/Requires", value=True)
         show_file_links = st.checkbox("Show File Links (CSS/JS/Images)", value=True)
@@ -25,7 +34,11 @@ def render_sidebar():
         'github_token': github_token,
         'aiml_api_key': aiml_api_key,
         'google_api_key': google_api_key,
+        'embedding_backend': embedding_backend,
+        'ai_deps_mode': ai_deps_mode,
         'layout_type': layout_type,
+        'graph_detail': graph_detail,
+        'physics': physics,
         'show_function_calls': show_function_calls,
         'show_imports': show_imports,
         'show_file_links': show_file_links,
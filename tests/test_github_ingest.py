@@ -0,0 +1,141 @@
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from utils import github_ingest
+from utils.disk_cache import DiskCache
+from utils.github_ingest import MAX_CONTENT_SIZE, GitHubTreeClient, RateLimited
+
+FILES = {
+    "src/app.py": "import os\n",
+    "src/util.py": "def helper():\n    return 1\n",
+    "assets/logo.png": "\0PNG",
+    "node_modules/lib/index.js": "module.exports = 1\n",
+}
+LARGE_FILE = "src/generated.py"  # Listed with a size over MAX_CONTENT_SIZE, never downloaded
+SHAS = {path: hashlib.sha1(content.encode()).hexdigest() for path, content in FILES.items()}
+SHAS[LARGE_FILE] = "f" * 40
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    """Git Trees and blobs endpoints of the GitHub API for one repository"""
+
+    requests = Counter()
+    blob_status = {}  # sha -> HTTP status to answer instead of the blob
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if "/git/trees/" in self.path:
+            self.requests["tree"] += 1
+            tree = [{"path": "src", "type": "tree", "sha": "d1"}, {"path": "assets", "type": "tree", "sha": "d2"}]
+            tree += [{"path": path, "type": "blob", "sha": SHAS[path], "size": len(content)}
+                     for path, content in FILES.items()]
+            tree.append({"path": LARGE_FILE, "type": "blob", "sha": SHAS[LARGE_FILE], "size": MAX_CONTENT_SIZE})
+            body = json.dumps({"sha": "t", "truncated": False, "tree": tree}).encode()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.requests["tree_not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self._send(200, body, {"ETag": etag, "Content-Type": "application/json"})
+        elif "/git/blobs/" in self.path:
+            sha = self.path.rsplit("/", 1)[1]
+            self.requests[sha] += 1
+            if sha in self.blob_status:
+                self._send(self.blob_status[sha], b"{}")
+                return
+            path = next(path for path, file_sha in SHAS.items() if file_sha == sha)
+            self._send(200, FILES[path].encode())
+        else:
+            self._send(404, b"{}")
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class GitHubTreeClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHub)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubGitHub.requests.clear()
+        StubGitHub.blob_status.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+
+    def client(self):
+        def cache(namespace, budget=None):
+            return DiskCache(namespace, root=self.cache_dir, budget=budget)
+
+        with mock.patch.object(github_ingest, "DiskCache", cache):
+            return GitHubTreeClient(api_url=f"http://127.0.0.1:{self.server.server_port}", workers=4)
+
+    def fetch(self, client=None):
+        return (client or self.client()).fetch_repo("owner", "repo", extensions={".py"})
+
+    def test_one_tree_request_and_only_matching_blobs(self):
+        files, repo_structure = self.fetch()
+
+        self.assertEqual(StubGitHub.requests["tree"], 1)
+        contents = {f["path"]: f["content"] for f in files}
+        self.assertEqual(set(contents), {"src/app.py", "src/util.py", "assets/logo.png", LARGE_FILE})
+        self.assertEqual(contents["src/app.py"], FILES["src/app.py"])
+        self.assertEqual(contents["src/util.py"], FILES["src/util.py"])
+        # Other extensions and files over the size limit are listed but not downloaded
+        self.assertEqual(contents["assets/logo.png"], "")
+        self.assertEqual(contents[LARGE_FILE], "")
+        self.assertEqual(StubGitHub.requests[SHAS["assets/logo.png"]], 0)
+        self.assertEqual(StubGitHub.requests[SHAS[LARGE_FILE]], 0)
+        self.assertEqual(StubGitHub.requests[SHAS["node_modules/lib/index.js"]], 0)
+        self.assertEqual(repo_structure["dirs"], {"src", "assets"})
+        self.assertNotIn("incomplete", repo_structure)
+
+    def test_repeat_run_revalidates_tree_with_etag(self):
+        self.fetch()
+        files, _ = self.fetch()
+
+        self.assertEqual(StubGitHub.requests["tree"], 2)
+        self.assertEqual(StubGitHub.requests["tree_not_modified"], 1)
+        self.assertEqual(StubGitHub.requests[SHAS["src/app.py"]], 1)
+        self.assertEqual({f["path"]: f["content"] for f in files}["src/app.py"], FILES["src/app.py"])
+
+    def test_rate_limit_stops_ingestion(self):
+        for status in (403, 429):
+            with self.subTest(status=status):
+                StubGitHub.blob_status[SHAS["src/app.py"]] = status
+                with self.assertRaises(RateLimited):
+                    self.fetch()
+
+    def test_failed_download_marks_result_incomplete(self):
+        StubGitHub.blob_status[SHAS["src/app.py"]] = 500
+
+        files, repo_structure = self.fetch()
+
+        self.assertEqual(repo_structure["incomplete"], 1)
+        self.assertEqual({f["path"]: f["content"] for f in files}["src/util.py"], FILES["src/util.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
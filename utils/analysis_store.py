@@ -0,0 +1,250 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from utils.disk_cache import CACHE_DIR, content_hash
+
+ANALYSIS_DB = os.environ.get("CODE_COMPASS_ANALYSIS_DB", os.path.join(CACHE_DIR, "analysis.db"))
+MAX_RESIDENT_ARTIFACTS = int(os.environ.get("CODE_COMPASS_MAX_RESIDENT_ARTIFACTS", "32"))
+ANALYSIS_BUDGET_BYTES = int(os.environ.get("CODE_COMPASS_ANALYSIS_BUDGET_MB", "1024")) * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    analysis TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (analysis, name)
+);
+CREATE TABLE IF NOT EXISTS files (
+    analysis TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content BLOB NOT NULL,
+    PRIMARY KEY (analysis, path)
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis TEXT PRIMARY KEY,
+    last_used REAL NOT NULL
+);
+"""
+
+# Artifacts that together make a complete dependency graph for a commit. They are stored
+# under graph_key, one per set of graph settings (e.g. the AI dependency mode), so sessions
+# with different settings never overwrite each other's graph; graph_settings is only
+# written once the graph is complete
+GRAPH_ARTIFACTS = {"files", "repo_structure", "full_graph", "file_dependencies", "graph_settings"}
+
+
+def analysis_key(owner, repo, commit):
+    return f"{owner}/{repo}@{commit}"
+
+
+def graph_key(analysis, graph_settings):
+    return f"{analysis}#{content_hash(repr(sorted(graph_settings.items())))[:12]}"
+
+
+class AnalysisStore:
+    """Analysis results on disk (SQLite + zlib), shared by every session and process
+
+    Artifacts are pickled and compressed; file contents get their own table so they can
+    be read one file at a time. Recently used artifacts stay resident in this process.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or ANALYSIS_DB
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._resident = OrderedDict()  # (analysis, name) -> value
+        self._resident_lock = threading.Lock()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections must stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # Only takes effect for a new database; lets eviction hand pages back to the OS
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key, value):
+        with self._resident_lock:
+            self._resident[key] = value
+            self._resident.move_to_end(key)
+            while len(self._resident) > MAX_RESIDENT_ARTIFACTS:
+                self._resident.popitem(last=False)
+
+    def touch(self, analysis):
+        """Record a use of this analysis for LRU eviction"""
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO analyses (analysis, last_used) VALUES (?, ?)",
+                         (analysis, time.time()))
+
+    def evict_lru(self, budget=ANALYSIS_BUDGET_BYTES, keep=()):
+        """Delete least recently used analyses, except those in `keep`, until the stored data fits the budget"""
+        conn = self._connect()
+        sizes = {}
+        for table, column in (("artifacts", "data"), ("files", "content")):
+            for analysis, size in conn.execute(
+                    f"SELECT analysis, SUM(LENGTH({column})) FROM {table} GROUP BY analysis"):
+                sizes[analysis] = sizes.get(analysis, 0) + size
+        last_used = dict(conn.execute("SELECT analysis, last_used FROM analyses"))
+        total = sum(sizes.values())
+        evicted = []
+        for analysis in sorted(sizes, key=lambda a: last_used.get(a, 0.0)):
+            if total <= budget:
+                break
+            if analysis in keep:
+                continue
+            with conn:
+                for table in ("artifacts", "files", "analyses"):
+                    conn.execute(f"DELETE FROM {table} WHERE analysis = ?", (analysis,))
+            total -= sizes[analysis]
+            evicted.append(analysis)
+        if evicted:
+            conn.execute("PRAGMA incremental_vacuum")
+            with self._resident_lock:
+                for key in [key for key in self._resident if key[0] in evicted]:
+                    del self._resident[key]
+            print(f"🧹 Evicted {len(evicted)} stored analyses")
+
+    def names(self, analysis):
+        rows = self._connect().execute("SELECT name FROM artifacts WHERE analysis = ?", (analysis,))
+        return {name for (name,) in rows}
+
+    def get(self, analysis, name, default=None):
+        key = (analysis, name)
+        with self._resident_lock:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                return self._resident[key]
+        row = self._connect().execute(
+            "SELECT data FROM artifacts WHERE analysis = ? AND name = ?", (analysis, name)).fetchone()
+        if row is None:
+            return default
+        value = pickle.loads(zlib.decompress(row[0]))
+        self._remember(key, value)
+        return value
+
+    def put(self, analysis, name, value):
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO artifacts (analysis, name, data, updated) VALUES (?, ?, ?, ?)",
+                         (analysis, name, data, time.time()))
+        self._remember((analysis, name), value)
+
+    def put_files(self, analysis, files):
+        """Store file contents and the file list (without contents) for an analysis"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (analysis, path, content) VALUES (?, ?, ?)",
+                ((analysis, f["path"], zlib.compress((f.get("content") or "").encode("utf-8")))
+                 for f in files))
+        self.put(analysis, "files", [{key: value for key, value in f.items() if key != "content"}
+                                     for f in files])
+
+    def file_content(self, analysis, path):
+        row = self._connect().execute(
+            "SELECT content FROM files WHERE analysis = ? AND path = ?", (analysis, path)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else ""
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide AnalysisStore"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStore()
+        return _store
+
+
+def _remove_database(path):
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def scratch_store():
+    """Private AnalysisStore in a temp file, deleted once nothing references it
+
+    For analyses without a commit: nothing could ever look them up again, so they are
+    kept out of the shared store.
+    """
+    fd, path = tempfile.mkstemp(prefix="analysis_", suffix=".db")
+    os.close(fd)
+    store = AnalysisStore(path)
+    weakref.finalize(store, _remove_database, path)
+    return store
+
+
+class StoredRepoFile(dict):
+    """File record whose content is read from the analysis store on each access"""
+
+    def __init__(self, handle, **fields):
+        super().__init__(**fields)
+        self.handle = handle
+
+    def __missing__(self, key):
+        if key != "content":
+            raise KeyError(key)
+        # Not cached on the record, so sessions never hold whole repositories in memory
+        return self.handle.store.file_content(self.handle.graph_key, self["path"])
+
+    def get(self, key, default=None):
+        if key == "content":
+            return self["content"]
+        return super().get(key, default)
+
+
+class AnalysisHandle:
+    """What a session keeps in st.session_state: a key into the shared analysis store
+
+    With graph_settings, the graph artifacts are read and written under the matching
+    graph_key; reports and summaries stay under the commit's key and are shared.
+    """
+
+    def __init__(self, key, store=None, graph_settings=None):
+        self.key = key
+        self.graph_key = graph_key(key, graph_settings) if graph_settings else key
+        self.store = store or get_store()
+        self.store.touch(self.key)
+        self.store.touch(self.graph_key)
+
+    def _key_for(self, name):
+        return self.graph_key if name in GRAPH_ARTIFACTS else self.key
+
+    def names(self):
+        return ({name for name in self.store.names(self.key) if name not in GRAPH_ARTIFACTS}
+                | {name for name in self.store.names(self.graph_key) if name in GRAPH_ARTIFACTS})
+
+    def has(self, name):
+        return name in self.names()
+
+    def get(self, name, default=None):
+        return self.store.get(self._key_for(name), name, default)
+
+    def put(self, name, value):
+        self.store.put(self._key_for(name), name, value)
+
+    def put_files(self, files):
+        self.store.put_files(self.graph_key, files)
+
+    @property
+    def files(self):
+        return [StoredRepoFile(self, **fields) for fields in self.get("files", [])]
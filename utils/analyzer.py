@@ -6,40 +6,57 @@ import os
 import json
 import re
 import ast
-import tempfile
 import subprocess
-import glob
 import shutil
+import uuid
 from github import Github
 from collections import defaultdict
 from urllib.parse import urlparse, urljoin
 from openai import OpenAI
 import pandas as pd
-from langchain.docstore.document import Document
 from langchain_community.vectorstores import FAISS
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-import google.generativeai as genai
-from typing import List
+from typing import Iterator
+from utils.disk_cache import DiskCache, content_hash
+from utils.llm_executor import LLMExecutor
+from utils.index_store import index_dir_for, is_built, touch, prepare_build_dir, publish, evict_lru
+from utils.vectorstore_cache import get_vectorstore, get_lexical_index, invalidate
+from utils.retrieval import LexicalIndex, hybrid_search
+from utils.embedding_pipeline import EmbeddingPipeline
+from utils.embeddings import get_embedding_backend
+from utils.chunking import chunk_source, CHUNKER_VERSION
+from utils.repo_walker import walk_repository, WalkedFile
 
-INDEX_DIR = "faiss_index"
+INDEXED_EXTENSIONS = [".py", ".js", ".ts", ".tsx", ".java", ".go", ".md", ".yaml", ".yml"]
+INDEX_DIR = "faiss_index"  # Root; each repo@commit+model gets its own namespace below it
+AIML_BASE_URL = os.environ.get("AIML_BASE_URL", "https://api.aimlapi.com/v1")
+LLM_MODEL = "openai/gpt-5-2025-08-07"
+# Bump when the dependency prompt changes so cached AI results are not reused
+AI_DEPS_PROMPT_VERSION = "1"
+FILE_SUMMARY_PROMPT_VERSION = "1"
+# Fetched or checked out besides source files: docs and config worth summarizing
+CONTENT_TEXT_EXTENSIONS = {".md", ".rst", ".txt", ".json", ".toml", ".cfg", ".ini", ".xml"}
+FILE_SUMMARY_BATCH_SIZE = int(os.environ.get("FILE_SUMMARY_BATCH_SIZE", "8"))
 
 class AdvancedDependencyAnalyzer:
-    def __init__(self, aiml_api_key=None, google_api_key=None):
+    def __init__(self, aiml_api_key=None, google_api_key=None, llm_workers=None, llm_requests_per_minute=None,
+                 embedding_backend="auto", ai_deps_mode="adaptive"):
         self.openai_client = None
+        self.ai_deps_mode = ai_deps_mode  # "adaptive", "all" or "off"
+        self.llm_executor = LLMExecutor(max_workers=llm_workers, requests_per_minute=llm_requests_per_minute)
+        self.ai_deps_cache = DiskCache("ai_dependencies")
+        self.file_summary_cache = DiskCache("file_summaries")
+        self.index_dir = None
+        self._index_model = (None, None)
         if aiml_api_key:
             try:
                 self.openai_client = OpenAI(
-                    base_url='https://api.aimlapi.com/v1',
+                    base_url=AIML_BASE_URL,
                     api_key=aiml_api_key
                 )
             except:
                 st.warning("Invalid AIML API key")
         
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=google_api_key)
-        else:
-            self.embedding_model = None
+        self.embedding_model, self.embedding_model_id = get_embedding_backend(embedding_backend, google_api_key)
     
     def extract_repo_info(self, url):
         pattern = r"github\.com\/([\w.-]+)\/([\w.-]+)"
@@ -48,7 +65,28 @@ class AdvancedDependencyAnalyzer:
             return match.group(1), match.group(2)
         return None, None
     
-    def get_repo_contents(self, username, repo_name, github_token=None):
+    def content_extensions(self):
+        """Extensions whose content analysis reads; other files are only listed"""
+        from utils.static_extraction import AI_ONLY_EXTENSIONS, STATIC_EXTRACTORS
+        
+        return set(STATIC_EXTRACTORS) | AI_ONLY_EXTENSIONS | set(INDEXED_EXTENSIONS) | CONTENT_TEXT_EXTENSIONS
+    
+    def get_repo_contents(self, username, repo_name, github_token=None, ref=None, progress=None):
+        """Files and structure over the GitHub API, for when the repository cannot be cloned"""
+        from utils.github_ingest import GitHubTreeClient
+        
+        # Fast path: one recursive tree request, then only the blobs analysis actually reads
+        try:
+            client = GitHubTreeClient(github_token)
+            files, repo_structure = client.fetch_repo(username, repo_name, ref or "HEAD",
+                                                      extensions=self.content_extensions(), progress=progress)
+            if repo_structure.get("incomplete"):
+                st.warning(f"{repo_structure['incomplete']} files could not be downloaded; their dependencies "
+                           "are missing and the analysis will be fetched again next time")
+            return files, repo_structure
+        except Exception as e:
+            print(f"⚠️ Git Trees ingestion failed ({e}), walking directories instead")
+        
         try:
             g = Github(github_token) if github_token else Github()
             repo = g.get_repo(f"{username}/{repo_name}")
@@ -94,76 +132,239 @@ class AdvancedDependencyAnalyzer:
             st.error(f"Error accessing repository: {str(e)}")
             return [], {"dirs": set(), "files": []}
     
-    def clone_repo(self, repo_url):
-        print("⬇ Cloning repository...")
-        repo_dir = tempfile.mkdtemp(prefix="repo_")
-        subprocess.run(["git", "clone", "--depth", "1", repo_url, repo_dir], check=True)
-        return repo_dir
+    def get_local_repo_contents(self, repo_path):
+        """Build the files/repo_structure pair from a local clone without the GitHub API"""
+        from utils.local_repo import scan_local_repo
+        
+        try:
+            return scan_local_repo(repo_path)
+        except Exception as e:
+            st.error(f"Error reading local repository: {str(e)}")
+            return [], {"dirs": set(), "files": []}
+    
+    def get_remote_head(self, repo_url):
+        """Commit sha of the remote HEAD via `git ls-remote`, without cloning"""
+        try:
+            output = subprocess.run(["git", "ls-remote", repo_url, "HEAD"],
+                                    check=True, capture_output=True, text=True, timeout=60).stdout
+            return output.split()[0] if output.strip() else None
+        except Exception:
+            return None
+    
+    def get_repo_commit(self, repo_path):
+        try:
+            return subprocess.run(["git", "-C", repo_path, "rev-parse", "HEAD"],
+                                  check=True, capture_output=True, text=True).stdout.strip()
+        except Exception:
+            return None
+    
+    def use_index(self, username, repo_name, commit):
+        """Select the index namespace for username/repo_name@commit and the current embedding model"""
+        # Without a commit there is nothing to safely reuse, so use a throwaway namespace
+        commit = commit or f"unversioned-{uuid.uuid4().hex[:12]}"
+        self.index_dir = index_dir_for(INDEX_DIR, username, repo_name, commit, self.embedding_model_id or "none")
+        return self.index_dir
+    
+    def has_index(self):
+        return bool(self.embedding_model and self.index_dir and is_built(self.index_dir)
+                    and not self.index_model_mismatch())
     
-    def chunk_text(self, text: str, chunk_size: int = 800, overlap: int = 120) -> List[str]:
-        lines = text.splitlines()
-        chunks = []
-        i = 0
-        while i < len(lines):
-            j = min(i + chunk_size, len(lines))
-            chunks.append("\n".join(lines[i:j]))
-            if j == len(lines):
-                break
-            i = max(j - overlap, i + 1)
-        return [c for c in chunks if c.strip()]
+    def index_model_mismatch(self):
+        """Error message if the selected index was built by a different embedding backend"""
+        from utils.index_manifest import load_manifest
+        
+        # Published indexes never change in place, so read the manifest once per index
+        if self._index_model[0] != self.index_dir:
+            manifest = load_manifest(self.index_dir) if self.index_dir else None
+            self._index_model = (self.index_dir, manifest.get("embedding_model") if manifest else None)
+        built_with = self._index_model[1]
+        if built_with and built_with != self.embedding_model_id:
+            return f"Index was built with '{built_with}' but '{self.embedding_model_id}' is selected. Re-analyze the repository."
+        return None
+    
+    def clone_repo(self, repo_url, commit=None):
+        """Sparse checkout of repo_url from the local mirror cache; removed once no session holds it"""
+        from utils.repo_cache import checkout
+        
+        print("⬇ Preparing checkout...")
+        return checkout(repo_url, commit, extensions=self.content_extensions())
     
-    def load_code_files(self, repo_path: str, extensions=None) -> List[str]:
+    def load_code_files(self, repo_path: str, extensions=None) -> Iterator[WalkedFile]:
+        """Lazily yield indexable text files from a single pruned walk of the repository"""
         if extensions is None:
-            extensions = [".py", ".js", ".ts", ".tsx", ".java", ".go", ".md", ".yaml", ".yml"]
-        files = []
-        for ext in extensions:
-            files.extend(glob.glob(f"{repo_path}/**/*{ext}", recursive=True))
-        return [f for f in files if os.path.isfile(f) and os.path.getsize(f) <= 2_000_000]
+            extensions = INDEXED_EXTENSIONS
+        return walk_repository(repo_path, extensions=extensions, max_size=2_000_000, skip_binary=True)
     
-    def build_vectorstore(self, repo_path):
+    def build_vectorstore(self, repo_path, progress=None):
         if not self.embedding_model:
-            st.error("Google API key required for embeddings.")
+            st.error("Google API key required for the Google embedding backend (or choose the local backend).")
             return False
         
+        if self.index_dir is None:
+            self.use_index("local", os.path.basename(repo_path), self.get_repo_commit(repo_path))
+        # Another session's eviction may remove the index between the check and the touch
+        if self.has_index() and touch(self.index_dir):
+            print("♻️ Reusing existing index")
+            return True
+        
+        # Build in a private copy so concurrent sessions never see a half-written index
+        work_dir = prepare_build_dir(self.index_dir)
+        try:
+            built = self.update_vectorstore(repo_path, work_dir, progress)
+        except Exception:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+        if not built:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return False
+        publish(work_dir, self.index_dir)
+        invalidate(self.index_dir)
+        evict_lru(INDEX_DIR, keep=self.index_dir)
+        return True
+    
+    def update_vectorstore(self, repo_path, index_dir, progress=None):
+        """Bring the index in index_dir up to date with repo_path, embedding only changed files"""
+        from utils.index_manifest import blob_hash, git_blob_hashes, load_manifest, save_manifest, diff_manifest
+        
         print("🧱 Building vector store...")
-        docs = []
-        for fp in self.load_code_files(repo_path):
+        code_files = {f.rel_path: f.path for f in self.load_code_files(repo_path)}
+        
+        tracked = git_blob_hashes(repo_path)
+        current_hashes = {}
+        for rel_path, fp in code_files.items():
             try:
-                with open(fp, "r", errors="ignore") as f:
-                    txt = f.read()
-                for chunk in self.chunk_text(txt):
-                    docs.append(Document(page_content=chunk, metadata={"source": fp}))
-            except:
+                current_hashes[rel_path] = tracked.get(rel_path) or blob_hash(fp)
+            except OSError:
                 continue
-        vs = FAISS.from_documents(docs, self.embedding_model)
-        vs.save_local(INDEX_DIR)
+        
+        manifest = load_manifest(index_dir)
+        vs = None
+        if manifest is not None and os.path.exists(os.path.join(index_dir, "index.faiss")):
+            try:
+                vs = FAISS.load_local(index_dir, self.embedding_model, allow_dangerous_deserialization=True)
+            except Exception:
+                vs = None
+        if manifest is not None and (manifest.get("embedding_model") != self.embedding_model_id
+                                     or manifest.get("chunker") != CHUNKER_VERSION):
+            # Vectors from another backend or chunker are not comparable; start over
+            vs = None
+        if vs is None:
+            manifest = {"files": {}}
+            lexical = LexicalIndex()
+        else:
+            lexical = LexicalIndex.load(index_dir)
+        manifest["embedding_model"] = self.embedding_model_id
+        manifest["chunker"] = CHUNKER_VERSION
+        
+        to_embed, to_delete = diff_manifest(manifest, current_hashes)
+        
+        stale_ids = []
+        for rel_path in to_delete:
+            stale_ids.extend(manifest["files"].pop(rel_path)["ids"])
+        if stale_ids:
+            vs.delete(stale_ids)
+            lexical.remove(stale_ids)
+        
+        unreadable = set()
+        
+        def read_chunks():
+            # Reads one file at a time; the pipeline pulls from this as workers free up
+            for rel_path in to_embed:
+                blob = current_hashes[rel_path]
+                try:
+                    with open(code_files[rel_path], "r", errors="ignore") as f:
+                        txt = f.read()
+                except OSError as e:
+                    # Still reported, so progress reaches total_files; left out of the manifest to retry
+                    print(f"⚠️ Could not read {rel_path}: {e}")
+                    unreadable.add(rel_path)
+                    yield rel_path, []
+                    continue
+                yield rel_path, [
+                    (f"{rel_path}@{blob[:12]}#{i}", chunk["text"], {
+                        "source": rel_path,
+                        "start_line": chunk["start_line"],
+                        "end_line": chunk["end_line"],
+                        "symbols": ", ".join(chunk["symbols"])
+                    })
+                    for i, chunk in enumerate(chunk_source(txt, rel_path))
+                ]
+        
+        print(f"♻️ {len(current_hashes) - len(to_embed)} files unchanged, {len(to_embed)} to embed, {len(to_delete)} removed or changed")
+        pipeline = EmbeddingPipeline(self.embedding_model)
+        vs, file_ids, failed, rolled_back = pipeline.run(read_chunks(), total_files=len(to_embed), vectorstore=vs,
+                                                         progress=progress, on_added=lexical.add)
+        lexical.remove(rolled_back)
+        for rel_path, chunk_ids in file_ids.items():
+            if rel_path not in unreadable:
+                manifest["files"][rel_path] = {"blob": current_hashes[rel_path], "ids": chunk_ids}
+        if failed:
+            st.warning(f"Embedding failed for {len(failed)} files; they will be retried on the next analysis.")
+        if vs is None:
+            st.error("No indexable files found in the repository.")
+            return False
+        
+        if file_ids or stale_ids:
+            vs.save_local(index_dir)
+            lexical.save(index_dir)
+            save_manifest(index_dir, manifest)
         return True
     
+    def describe_source(self, doc):
+        """'path (lines a-b: symbols)' label for a retrieved chunk"""
+        label = doc.metadata.get("source", "Unknown")
+        if doc.metadata.get("start_line"):
+            label += f" (lines {doc.metadata['start_line']}-{doc.metadata['end_line']}"
+            if doc.metadata.get("symbols"):
+                label += f": {doc.metadata['symbols']}"
+            label += ")"
+        return label
+    
+    def stream_completion(self, prompt, temperature=0.1):
+        """Yield the completion text chunk by chunk as the model produces it"""
+        stream = self.openai_client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=LLM_MODEL,
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
     def generate_contribution_report(self):
+        return "".join(self.generate_contribution_report_stream())
+    
+    def generate_contribution_report_stream(self, errors=None):
+        """Yield the report; on failure yield the error text and append it to `errors`"""
         if not self.openai_client:
-            return "AIML API key required for contribution report."
-        
-        if not os.path.exists(INDEX_DIR):
-            return "Vector store not found. Please analyze the repository first."
-        
-        vs = FAISS.load_local(INDEX_DIR, self.embedding_model, allow_dangerous_deserialization=True)
-        queries = [
-            "README and documentation",
-            "tests and coverage",
-            "TODO and FIXME",
-            "main entrypoints and core modules",
-            "CI configuration and developer experience"
-        ]
-        gathered = []
-        seen = set()
-        for q in queries:
-            for d in vs.similarity_search(q, k=2):
-                key = (d.metadata.get("source"), d.page_content[:100])
-                if key not in seen:
-                    seen.add(key)
-                    gathered.append(d)
-        context = "\n\n".join([f"[SNIPPET {i}] {d.page_content}" for i, d in enumerate(gathered, 1)])
-        prompt = f"""
+            yield "AIML API key required for contribution report."
+            return
+        
+        if not self.has_index():
+            yield "Vector store not found. Please analyze the repository first."
+            return
+        
+        try:
+            touch(self.index_dir)
+            vs = get_vectorstore(self.index_dir, self.embedding_model)
+            queries = [
+                "README and documentation",
+                "tests and coverage",
+                "TODO and FIXME",
+                "main entrypoints and core modules",
+                "CI configuration and developer experience"
+            ]
+            gathered = []
+            seen = set()
+            for q in queries:
+                for d in vs.similarity_search_by_vector(self.embedding_model.embed_query(q), k=2):
+                    key = (d.metadata.get("source"), d.page_content[:100])
+                    if key not in seen:
+                        seen.add(key)
+                        gathered.append(d)
+            context = "\n\n".join([f"[SNIPPET {i}] {d.page_content}" for i, d in enumerate(gathered, 1)])
+            prompt = f"""
 You are an Open-Source Contribution Advisor.
 Analyze the repository and suggest:
 1. Opportunities
@@ -173,60 +374,127 @@ Analyze the repository and suggest:
 Context:
 {context}
 """
-        response = self.openai_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="openai/gpt-5-2025-08-07",
-            temperature=0.1
-        )
-        return response.choices[0].message.content
+            yield from self.stream_completion(prompt, temperature=0.1)
+        
+        except Exception as e:
+            if errors is not None:
+                errors.append(str(e))
+            yield f"Error generating contribution report: {str(e)}"
     
     def summarize_repo(self, contribution_report):
+        return "".join(self.summarize_repo_stream(contribution_report))
+    
+    def summarize_repo_stream(self, contribution_report, errors=None):
+        """Yield the summary; on failure yield the error text and append it to `errors`"""
         if not self.openai_client:
-            return "AIML API key required for repo summary."
+            yield "AIML API key required for repo summary."
+            return
         
         prompt = f"""
 Summarize the overall working of the repository in a few paragraphs. Focus on purpose, main components, and how it works.
 Based on this contribution report:
 {contribution_report}
 """
-        response = self.openai_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="openai/gpt-5-2025-08-07",
-            temperature=0.1
-        )
-        return response.choices[0].message.content
+        try:
+            yield from self.stream_completion(prompt, temperature=0.1)
+        except Exception as e:
+            if errors is not None:
+                errors.append(str(e))
+            yield f"Error generating repository summary: {str(e)}"
     
-    def summarize_file(self, file_path, content):
+    def file_summary_key(self, file_path, content):
+        return content_hash(FILE_SUMMARY_PROMPT_VERSION, LLM_MODEL, file_path, content[:1000])
+    
+    def cached_file_summary(self, file_path, content):
+        return self.file_summary_cache.get(self.file_summary_key(file_path, content))
+    
+    def summarize_files(self, files, on_result=None):
+        """Summarize [(path, content)] with several files per request, running requests concurrently
+        
+        Summaries are cached by content hash, so only new or changed files reach the LLM.
+        on_result(path, summary) is called (from worker threads) as each batch completes.
+        """
         if not self.openai_client:
-            return "AIML API key required for file summary."
+            return {}
+        
+        results = {}
+        missing = []
+        for file_path, content in files:
+            cached = self.cached_file_summary(file_path, content)
+            if cached is not None:
+                results[file_path] = cached
+                if on_result:
+                    on_result(file_path, cached)
+            else:
+                missing.append((file_path, content))
         
+        def run_batch(batch):
+            summaries = self._summarize_file_batch(batch)
+            for file_path, content in batch:
+                summary = summaries.get(file_path)
+                if isinstance(summary, str) and summary.strip():
+                    self.file_summary_cache.set(self.file_summary_key(file_path, content), summary.strip())
+                    if on_result:
+                        on_result(file_path, summary.strip())
+            return summaries
+        
+        batches = [missing[i:i + FILE_SUMMARY_BATCH_SIZE] for i in range(0, len(missing), FILE_SUMMARY_BATCH_SIZE)]
+        for summaries in self.llm_executor.map(run_batch, batches):
+            results.update({path: summary.strip() for path, summary in summaries.items()
+                            if isinstance(summary, str) and summary.strip()})
+        return results
+    
+    def _summarize_file_batch(self, batch):
+        """One LLM request for a batch of files; returns {path: summary}"""
+        sections = "\n\n".join(f"=== File: {file_path} ===\n{content[:1000]}" for file_path, content in batch)
         prompt = f"""
-Summarize the working of this file in a few words (1-2 sentences max). Focus on its purpose and key functions.
-File: {file_path}
-Content (snippet): {content[:1000]}...
+Summarize the working of each file below in a few words (1-2 sentences max). Focus on its purpose and key functions.
+Respond with ONLY a valid JSON object mapping each file path to its summary (no additional text).
+
+{sections}
 """
-        response = self.openai_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="openai/gpt-5-2025-08-07",
-            temperature=0.1
-        )
-        return response.choices[0].message.content
+        try:
+            client = self.openai_client.with_options(max_retries=0)
+            response = self.llm_executor.call(lambda: client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=LLM_MODEL,
+                temperature=0.1
+            ))
+            content_response = response.choices[0].message.content.strip()
+            json_match = re.search(r'\{.*\}', content_response, re.DOTALL)
+            result = json.loads(json_match.group() if json_match else content_response)
+            return result if isinstance(result, dict) else {}
+        except Exception as e:
+            print(f"⚠️ File summary batch failed: {e}")
+            return {}
     
     def answer_question(self, question):
+        return "".join(self.answer_question_stream(question))
+    
+    def answer_question_stream(self, question):
         if not self.openai_client:
-            return "AIML API key required for Q&A."
+            yield "AIML API key required for Q&A."
+            return
         
         if not self.embedding_model:
-            return "Google API key required for embeddings in Q&A."
+            yield "Google API key required for embeddings in Q&A (or choose the local backend)."
+            return
+        
+        if self.index_model_mismatch():
+            yield self.index_model_mismatch()
+            return
         
-        if not os.path.exists(INDEX_DIR):
-            return "Vector store not found. Please analyze the repository first."
+        if not self.has_index():
+            yield "Vector store not found. Please analyze the repository first."
+            return
         
         try:
             # Load vector store and get relevant documents
-            vs = FAISS.load_local(INDEX_DIR, self.embedding_model, allow_dangerous_deserialization=True)
-            docs = vs.similarity_search(question, k=10)
-            context = "\n\n".join([f"[SNIPPET {i}] File: {d.metadata.get('source', 'Unknown')}\n{d.page_content}" for i, d in enumerate(docs, 1)])
+            touch(self.index_dir)
+            vs = get_vectorstore(self.index_dir, self.embedding_model)
+            docs = hybrid_search(vs, get_lexical_index(self.index_dir), question,
+                                 self.embedding_model.embed_query(question), k=10)
+            context = "\n\n".join([f"[SNIPPET {i}] File: {self.describe_source(d)}\n{d.page_content}" for i, d in enumerate(docs, 1)])
             
             # Determine if this is an error/issue question
             is_error_question = any(keyword in question.lower() for keyword in 
@@ -264,21 +532,20 @@ Instructions:
 - If the context doesn't fully answer the question, mention what's missing
 """
             
-            response = self.openai_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="openai/gpt-5-2025-08-07",
-                temperature=0.3
-            )
-            
-            return response.choices[0].message.content
+            yield from self.stream_completion(prompt, temperature=0.3)
             
         except Exception as e:
-            return f"Error processing question: {str(e)}"
+            yield f"Error processing question: {str(e)}"
     
     def analyze_dependencies_with_ai(self, content, file_path):
         if not self.openai_client:
             return {}
         
+        cache_key = content_hash(AI_DEPS_PROMPT_VERSION, LLM_MODEL, file_path, content)
+        cached = self.ai_deps_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             prompt = f"""
             Analyze the following code file and extract dependencies, imports, and relationships.
@@ -298,11 +565,13 @@ Instructions:
             }}
             """
             
-            response = self.openai_client.chat.completions.create(
+            # The executor owns rate limiting and 429 backoff, so disable the client's own retries
+            client = self.openai_client.with_options(max_retries=0)
+            response = self.llm_executor.call(lambda: client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
-                model="openai/gpt-5-2025-08-07",
+                model=LLM_MODEL,
                 temperature=0.1
-            )
+            ))
             
             content_response = response.choices[0].message.content.strip()
             
@@ -311,7 +580,6 @@ Instructions:
                 result = json.loads(content_response)
             except json.JSONDecodeError:
                 # Try to find JSON within the response
-                import re
                 json_match = re.search(r'\{.*\}', content_response, re.DOTALL)
                 if json_match:
                     result = json.loads(json_match.group())
@@ -327,130 +595,117 @@ Instructions:
                 elif not isinstance(result[key], list):
                     result[key] = []
             
+            self.ai_deps_cache.set(cache_key, result)
             return result
             
         except Exception as e:
             # Don't show warning for every file, just continue with regex analysis
             return {}
     
-    def create_dependency_graph(self, files, repo_structure, options):
-        from utils.dependency_extractors import (
-            extract_python_dependencies,
-            extract_javascript_dependencies,
-            extract_html_dependencies,
-            extract_css_dependencies
+    def analyze_dependencies_with_ai_batch(self, items):
+        """Run analyze_dependencies_with_ai concurrently over [(content, file_path)]"""
+        return self.llm_executor.map(lambda item: self.analyze_dependencies_with_ai(*item), items)
+    
+    def graph_settings(self):
+        """Settings that change the dependency graph; a stored graph is only reused if they match"""
+        return {"ai_deps_mode": self.ai_deps_mode if self.openai_client else "off",
+                "ai_deps_prompt": AI_DEPS_PROMPT_VERSION}
+    
+    def extract_file_dependencies(self, files):
+        """Run static extraction for every graphable file and AI extraction where it is needed
+
+        In "adaptive" mode the LLM only sees files static analysis could not handle: parser
+        fallbacks, languages without a static extractor and low-confidence results.
+        """
+        from utils.static_extraction import (
+            AI_ONLY_EXTENSIONS, CODE_EXTENSIONS, STATIC_EXTRACTORS, extract_static_dependencies, needs_ai_review
         )
         
-        G = nx.DiGraph()
-        file_dependencies = {}
         ai_analysis_stats = {"success": 0, "failed": 0}
         
         filtered_files = [f for f in files if f["size"] < 1000000 and not any(
             skip in f["path"] for skip in [".git", "node_modules", "__pycache__", ".pytest_cache"]
         )]
         
-        if options.get("show_folder_structure", False):
-            for directory in repo_structure["dirs"]:
-                if directory:
-                    G.add_node(f"📁 {directory}", node_type="directory", color="#FFD700")
-        
+        static_inputs = []
+        ai_only_inputs = []
         for file in filtered_files:
-            file_path = file["path"]
-            content = file["content"]
-            file_ext = os.path.splitext(file_path)[1].lower()
-            
-            G.add_node(file_path, 
-                      node_type="file", 
-                      file_type=file_ext,
-                      size=file["size"],
-                      directory=file["directory"])
-            
-            if options.get("show_folder_structure", False) and file["directory"]:
-                G.add_edge(f"📁 {file['directory']}", file_path, 
-                          edge_type="contains", color="#CCCCCC")
-            
-            if file_ext == ".py" and content:
-                deps = extract_python_dependencies(content, file_path)
-                if self.openai_client:
-                    ai_deps = self.analyze_dependencies_with_ai(content, file_path)
-                    if ai_deps:  # Only merge if AI analysis succeeded
-                        ai_analysis_stats["success"] += 1
-                        for key in ai_deps:
-                            if key in deps:
-                                # Combine and deduplicate
-                                deps[key] = list(set(deps[key] + ai_deps[key]))
-                    else:
-                        ai_analysis_stats["failed"] += 1
-                file_dependencies[file_path] = deps
-            
-            elif file_ext in [".js", ".ts", ".jsx", ".tsx"] and content:
-                deps = extract_javascript_dependencies(content, file_path)
-                if self.openai_client:
-                    ai_deps = self.analyze_dependencies_with_ai(content, file_path)
-                    if ai_deps:
-                        ai_analysis_stats["success"] += 1
-                        for key in ai_deps:
-                            if key in deps:
-                                deps[key] = list(set(deps[key] + ai_deps[key]))
-                    else:
-                        ai_analysis_stats["failed"] += 1
-                file_dependencies[file_path] = deps
-            
-            elif file_ext == ".html" and content:
-                deps = extract_html_dependencies(content, file_path)
-                file_dependencies[file_path] = deps
-            
-            elif file_ext == ".css" and content:
-                deps = extract_css_dependencies(content, file_path)
-                file_dependencies[file_path] = deps
+            file_ext = os.path.splitext(file["path"])[1].lower()
+            if file_ext in STATIC_EXTRACTORS and file["content"]:
+                static_inputs.append((file["path"], file_ext, file["content"]))
+            elif file_ext in AI_ONLY_EXTENSIONS and file["content"]:
+                ai_only_inputs.append((file["content"], file["path"]))
+        
+        # Fanned out to worker processes on large repos; same result as extracting one by one
+        file_dependencies, unparsed = extract_static_dependencies(static_inputs)
+        code_inputs = [(file_path, file_ext, content) for file_path, file_ext, content in static_inputs
+                       if file_ext in CODE_EXTENSIONS]
+        
+        if self.ai_deps_mode == "all":
+            ai_candidates = [(content, file_path) for file_path, _, content in code_inputs] + ai_only_inputs
+        elif self.ai_deps_mode == "adaptive":
+            ai_candidates = [(content, file_path) for file_path, file_ext, content in code_inputs
+                             if file_path in unparsed or needs_ai_review(file_ext, content, file_dependencies[file_path])]
+            ai_candidates += ai_only_inputs
+        else:
+            ai_candidates = []
+        
+        if self.openai_client and ai_candidates:
+            ai_results = self.analyze_dependencies_with_ai_batch(ai_candidates)
+            for (_, file_path), ai_deps in zip(ai_candidates, ai_results):
+                if ai_deps:  # Only merge if AI analysis succeeded
+                    ai_analysis_stats["success"] += 1
+                    deps = file_dependencies.get(file_path)
+                    if deps is None:
+                        # No static extractor for this language; the AI result is all there is
+                        file_dependencies[file_path] = {key: list(values) for key, values in ai_deps.items()}
+                        continue
+                    for key in ai_deps:
+                        if key in deps:
+                            # Combine and deduplicate
+                            deps[key] = list(set(deps[key] + ai_deps[key]))
+                else:
+                    ai_analysis_stats["failed"] += 1
+        
+        # Calls "all" mode would have made that this run did not
+        skipped = len(code_inputs) + len(ai_only_inputs) - len(ai_candidates) if self.ai_deps_mode != "off" else 0
+        if self.openai_client and skipped:
+            print(f"⚡ Skipped {skipped} LLM dependency calls where static analysis was sufficient")
         
         # Show AI analysis summary instead of individual warnings
         if self.openai_client and (ai_analysis_stats["success"] + ai_analysis_stats["failed"]) > 0:
             total = ai_analysis_stats["success"] + ai_analysis_stats["failed"]
             success_rate = (ai_analysis_stats["success"] / total) * 100
+            skipped_note = f" ({skipped} files needed no LLM call)" if skipped else ""
             
             if ai_analysis_stats["failed"] > 0:
-                st.info(f"🤖 AI Analysis: {ai_analysis_stats['success']}/{total} files analyzed successfully ({success_rate:.0f}% success rate)")
+                st.info(f"🤖 AI Analysis: {ai_analysis_stats['success']}/{total} files analyzed successfully ({success_rate:.0f}% success rate){skipped_note}")
             else:
-                st.success(f"🤖 AI Analysis: All {ai_analysis_stats['success']} files analyzed successfully!")
+                st.success(f"🤖 AI Analysis: All {ai_analysis_stats['success']} files analyzed successfully!{skipped_note}")
+        elif self.openai_client and skipped:
+            st.success(f"🤖 AI Analysis: static analysis covered all {skipped} files, no LLM calls needed")
         
-        for file_path, deps in file_dependencies.items():
-            for other_file in filtered_files:
-                other_path = other_file["path"]
-                if file_path == other_path:
-                    continue
-                
-                if options.get("show_function_calls", True):
-                    other_deps = file_dependencies.get(other_path, {})
-                    for func in other_deps.get("functions", []):
-                        if func in deps.get("function_calls", []):
-                            G.add_edge(file_path, other_path, 
-                                     edge_type=f"calls_function_{func}",
-                                     color="#FF4444", weight=2)
-                
-                if options.get("show_imports", True):
-                    file_basename = os.path.splitext(os.path.basename(other_path))[0]
-                    relative_path = os.path.relpath(other_path, os.path.dirname(file_path))
-                    
-                    for imp in deps.get("imports", []):
-                        if (file_basename in imp or 
-                            relative_path.replace("\\", "/") in imp or
-                            other_path.replace("\\", "/") in imp):
-                            G.add_edge(file_path, other_path, 
-                                     edge_type="imports",
-                                     color="#4444FF", weight=3)
-                
-                if options.get("show_file_links", True):
-                    for link_type in ["css_links", "js_links", "image_links", "other_links"]:
-                        for link in deps.get(link_type, []):
-                            if os.path.basename(other_path) in link:
-                                G.add_edge(file_path, other_path, 
-                                         edge_type=link_type.replace("_links", "_link"),
-                                         color="#44FF44", weight=1)
-        
-        if options.get("min_connections", 0) > 0:
-            nodes_to_remove = [node for node in G.nodes() 
-                             if G.degree(node) < options["min_connections"]]
-            G.remove_nodes_from(nodes_to_remove)
-        
-        return G, file_dependencies
\ No newline at end of file
+        return filtered_files, file_dependencies
+    
+    def build_full_dependency_graph(self, files, repo_structure):
+        """Build the superset graph with every node and typed edge; filter it with project_graph"""
+        from utils.dependency_graph import build_full_graph
+        
+        filtered_files, file_dependencies = self.extract_file_dependencies(files)
+        file_nodes = {
+            f["path"]: {
+                "node_type": "file",
+                "file_type": os.path.splitext(f["path"])[1].lower(),
+                "size": f["size"],
+                "directory": f["directory"]
+            }
+            for f in filtered_files
+        }
+        graph = build_full_graph([f["path"] for f in filtered_files], repo_structure, file_dependencies, file_nodes)
+        return graph, file_dependencies
+    
+    def create_dependency_graph(self, files, repo_structure, options):
+        from utils.dependency_graph import project_graph
+        
+        full_graph, file_dependencies = self.build_full_dependency_graph(files, repo_structure)
+        return project_graph(full_graph, options), file_dependencies
@@ -0,0 +1,168 @@
+import ast
+import os
+import re
+
+CHUNK_MAX_CHARS = int(os.environ.get("CHUNK_MAX_CHARS", "4000"))
+CHUNK_TARGET_CHARS = int(os.environ.get("CHUNK_TARGET_CHARS", "1500"))
+# Stored in the index manifest; bump when chunk boundaries change so indexes are rebuilt
+CHUNKER_VERSION = "definitions-v1"
+
+# Definition-boundary heuristics: a match at the start of a line opens a new segment
+BOUNDARY_PATTERNS = {
+    "javascript": re.compile(
+        r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\*?\s+(?P<func>\w+)"
+        r"|(?:abstract\s+)?class\s+(?P<cls>\w+)"
+        r"|(?:interface|type|enum)\s+(?P<type>\w+)"
+        r"|(?:const|let|var)\s+(?P<var>\w+)\s*=\s*(?:async\s+)?(?:function|\([^)]*\)\s*=>|\w+\s*=>))"
+    ),
+    "go": re.compile(
+        r"^(?:func\s+(?:\([^)]*\)\s*)?(?P<func>\w+)|type\s+(?P<type>\w+))"
+    ),
+    "java": re.compile(
+        r"^\s{0,4}(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|private|protected|static|final|abstract|sealed|synchronized)\s+)*"
+        r"(?:(?:class|interface|enum|record)\s+(?P<cls>\w+)"
+        r"|(?:<[^>]+>\s+)?[\w<>\[\],.? ]+\s+(?P<func>\w+)\s*\([^;]*$)"
+    ),
+    "markdown": re.compile(r"^#{1,3}\s+(?P<heading>.+)"),
+}
+
+LANGUAGES = {
+    ".js": "javascript", ".jsx": "javascript", ".ts": "javascript", ".tsx": "javascript",
+    ".go": "go", ".java": "java", ".md": "markdown",
+}
+
+
+def _python_segments(text):
+    """(start_line, end_line, symbols) per top-level statement, with defs/classes marked"""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+
+    def segments_for(nodes, end_line, prefix=""):
+        segments = []
+        for i, node in enumerate(nodes):
+            start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+            if i + 1 < len(nodes):
+                nxt = nodes[i + 1]
+                stop = min([nxt.lineno] + [d.lineno for d in getattr(nxt, "decorator_list", [])]) - 1
+            else:
+                stop = end_line
+            symbols = []
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                symbols.append(prefix + node.name)
+            segments.append((start, stop, symbols, node))
+        return segments
+
+    lines = text.splitlines()
+    body = segments_for(tree.body, len(lines))
+    if body and body[0][0] > 1:
+        body.insert(0, (1, body[0][0] - 1, [], None))
+
+    result = []
+    for start, stop, symbols, node in body:
+        size = sum(len(line) + 1 for line in lines[start - 1:stop])
+        if isinstance(node, ast.ClassDef) and size > CHUNK_MAX_CHARS and node.body:
+            # Large class: keep the header with the first member, then split per method
+            members = segments_for(node.body, stop, prefix=node.name + ".")
+            first_start, first_stop, first_symbols, _ = members[0]
+            result.append((start, first_stop, symbols + first_symbols))
+            result.extend((s, e, syms) for s, e, syms, _ in members[1:])
+        else:
+            result.append((start, stop, symbols))
+    return result
+
+
+def _pattern_segments(text, pattern):
+    lines = text.splitlines()
+    starts = []
+    for lineno, line in enumerate(lines, 1):
+        match = pattern.match(line)
+        if match:
+            name = next((value for value in match.groupdict().values() if value), "")
+            starts.append((lineno, name.strip()))
+    if not starts:
+        return None
+    if starts[0][0] != 1:
+        starts.insert(0, (1, None))
+
+    segments = []
+    for i, (start, name) in enumerate(starts):
+        stop = starts[i + 1][0] - 1 if i + 1 < len(starts) else len(lines)
+        segments.append((start, stop, [name] if name else []))
+    return segments
+
+
+def _split_oversized(lines, start, stop, symbols, max_chars):
+    """Split a segment that exceeds the budget into line windows, preferring blank lines"""
+    pieces = []
+    piece_start, size, last_blank = start, 0, None
+    for lineno in range(start, stop + 1):
+        line_size = len(lines[lineno - 1]) + 1
+        if size + line_size > max_chars and lineno > piece_start:
+            cut = last_blank if last_blank and last_blank > piece_start else lineno - 1
+            pieces.append((piece_start, cut, symbols))
+            piece_start = cut + 1
+            size = sum(len(lines[n - 1]) + 1 for n in range(piece_start, lineno))
+            last_blank = None
+        size += line_size
+        if not lines[lineno - 1].strip():
+            last_blank = lineno
+    pieces.append((piece_start, stop, symbols))
+    return pieces
+
+
+def chunk_source(text, path, max_chars=None, target_chars=None):
+    """Split a file into chunks on definition boundaries
+
+    Returns [{"text", "start_line", "end_line", "symbols"}] with 1-based inclusive line
+    ranges. Small neighbouring segments are packed up to target_chars and no chunk
+    exceeds max_chars.
+    """
+    max_chars = max_chars or CHUNK_MAX_CHARS
+    target_chars = min(target_chars or CHUNK_TARGET_CHARS, max_chars)
+    lines = text.splitlines()
+    if not lines:
+        return []
+
+    ext = os.path.splitext(path)[1].lower()
+    segments = None
+    if ext == ".py":
+        segments = _python_segments(text)
+    elif ext in LANGUAGES:
+        segments = _pattern_segments(text, BOUNDARY_PATTERNS[LANGUAGES[ext]])
+    if not segments:
+        segments = [(1, len(lines), [])]
+
+    sized = []
+    for start, stop, symbols in segments:
+        if stop < start:
+            continue
+        for piece in _split_oversized(lines, start, stop, symbols, max_chars):
+            sized.append(piece + (sum(len(line) + 1 for line in lines[piece[0] - 1:piece[1]]),))
+
+    chunks = []
+    current = None
+    for start, stop, symbols, size in sized:
+        if current and current["size"] + size <= target_chars:
+            current["end_line"] = stop
+            current["symbols"].extend(symbols)
+            current["size"] += size
+            continue
+        current = {"start_line": start, "end_line": stop, "symbols": list(symbols), "size": size}
+        chunks.append(current)
+
+    result = []
+    for chunk in chunks:
+        chunk_text = "\n".join(lines[chunk["start_line"] - 1:chunk["end_line"]])
+        # Only a single over-long line (e.g. minified code) can still exceed the budget
+        for offset in range(0, len(chunk_text), max_chars):
+            piece = chunk_text[offset:offset + max_chars]
+            if piece.strip():
+                result.append({
+                    "text": piece,
+                    "start_line": chunk["start_line"],
+                    "end_line": chunk["end_line"],
+                    "symbols": chunk["symbols"],
+                })
+    return result
@@ -2,15 +2,83 @@ import ast
 import re
 import os
 
-def extract_python_dependencies(content, file_path):
-    """Extract dependencies from Python files"""
-    dependencies = {
+# File extension -> extractor(content, file_path) -> dependencies
+EXTRACTORS = {}
+
+def register_extractor(*extensions):
+    """Decorator: make the function the static extractor for these file extensions"""
+    def register(extractor):
+        for extension in extensions:
+            EXTRACTORS[extension] = extractor
+        return extractor
+    return register
+
+JS_IMPORT_PATTERNS = [re.compile(pattern) for pattern in [
+    r"import\s+.*?\s+from\s+['\"]([^'\"]+)['\"]",
+    r"import\s+['\"]([^'\"]+)['\"]",
+    r"require\s*\(\s*['\"]([^'\"]+)['\"]\s*\)",
+    r"import\(\s*['\"]([^'\"]+)['\"]\s*\)"
+]]
+JS_FUNCTION_PATTERNS = [re.compile(pattern) for pattern in [
+    r"function\s+(\w+)\s*\(",
+    r"const\s+(\w+)\s*=\s*function\s*\(",
+    r"const\s+(\w+)\s*=\s*\([^)]*\)\s*=>",
+    r"(\w+)\s*:\s*function\s*\(",
+    r"(\w+)\s*:\s*\([^)]*\)\s*=>"
+]]
+JS_CLASS_PATTERN = re.compile(r"class\s+(\w+)")
+CALL_PATTERN = re.compile(r"(\w+)\s*\(")
+
+HTML_CSS_PATTERN = re.compile(r'<link[^>]*href=["\']([^"\']+\.css)["\']', re.IGNORECASE)
+HTML_JS_PATTERN = re.compile(r'<script[^>]*src=["\']([^"\']+\.js[^"\']*)["\']', re.IGNORECASE)
+HTML_IMG_PATTERN = re.compile(r'<img[^>]*src=["\']([^"\']+)["\']', re.IGNORECASE)
+HTML_ASSET_PATTERN = re.compile(r'href=["\']([^"\']+\.(png|jpg|jpeg|gif|svg|ico|woff|woff2|ttf|eot))["\']', re.IGNORECASE)
+
+CSS_IMPORT_PATTERN = re.compile(r'@import\s+["\']([^"\']+)["\']')
+CSS_URL_PATTERN = re.compile(r'url\s*\(\s*["\']?([^"\')\s]+)["\']?\s*\)')
+
+# One alternation per language, scanned once; earlier alternatives win at the same position.
+# Comments and string literals are matched as `skip` so nothing inside them is picked up.
+GO_SCANNER = re.compile(r"""
+    (?P<skip>//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|`[^`]*`|'(?:\\.|[^'\\\n])*')
+  | ^[ \t]*package[ \t]+(?P<package>\w+)
+  | ^[ \t]*import[ \t]*\((?P<import_block>[^)]*)\)
+  | ^[ \t]*import[ \t]+(?:[\w.]+[ \t]+)?"(?P<import>[^"]+)"
+  | ^func[ \t]+(?:\([^)]*\)[ \t]*)?(?P<function>\w+)[ \t]*[\[(]
+  | ^[ \t]*type[ \t]+(?P<type>\w+)(?:\[[^\]]*\])?[ \t]+(?:struct|interface)\b
+  | (?P<call>\w+)[ \t]*\(
+""", re.MULTILINE | re.VERBOSE | re.DOTALL)
+GO_BLOCK_IMPORT_PATTERN = re.compile(r'"([^"]+)"')
+
+JAVA_SCANNER = re.compile(r"""
+    (?P<skip>//[^\n]*|/\*.*?\*/|\"\"\".*?\"\"\"|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | ^[ \t]*package[ \t]+(?P<package>[\w.]+)[ \t]*;
+  | ^[ \t]*import[ \t]+(?:static[ \t]+)?(?P<import>[\w.]+(?:\.\*)?)[ \t]*;
+  | ^[ \t]*(?:@\w+(?:\([^)\n]*\))?[ \t]+)*
+      (?:(?:public|protected|private|static|final|abstract|sealed|non-sealed|strictfp)[ \t]+)*
+      (?:class|interface|enum|record|@interface)[ \t]+(?P<type>\w+)
+  | ^[ \t]*(?:(?:public|protected|private|static|final|abstract|synchronized|native|default)[ \t]+)*
+      (?:<[^>\n]+>[ \t]+)?(?!(?:return|new|else|throw)\b)[\w.$]+(?:<[^>\n]*>)?(?:\[\])*[ \t]+(?P<function>\w+)[ \t]*\(
+  | (?P<call>\w+)[ \t]*\(
+""", re.MULTILINE | re.VERBOSE | re.DOTALL)
+
+def _empty_code_dependencies():
+    return {
         "imports": [],
         "functions": [],
         "classes": [],
         "function_calls": [],
         "file_references": []
     }
+
+@register_extractor(".py")
+def extract_python_dependencies(content, file_path):
+    """Extract dependencies from Python files"""
+    return extract_python_dependencies_with_status(content, file_path)[0]
+
+def extract_python_dependencies_with_status(content, file_path):
+    """(dependencies, parsed) where parsed is False when the regex fallback was used"""
+    dependencies = _empty_code_dependencies()
     
     try:
         tree = ast.parse(content)
@@ -37,50 +105,57 @@ def extract_python_dependencies(content, file_path):
     
     except Exception as e:
         dependencies.update(extract_with_regex(content, "python"))
+        return dependencies, False
     
-    return dependencies
+    return dependencies, True
 
+@register_extractor(".js", ".ts", ".jsx", ".tsx")
 def extract_javascript_dependencies(content, file_path):
     """Extract dependencies from JavaScript/TypeScript files"""
-    dependencies = {
-        "imports": [],
-        "functions": [],
-        "classes": [],
-        "function_calls": [],
-        "file_references": []
-    }
-    
-    import_patterns = [
-        r"import\s+.*?\s+from\s+['\"]([^'\"]+)['\"]",
-        r"import\s+['\"]([^'\"]+)['\"]",
-        r"require\s*\(\s*['\"]([^'\"]+)['\"]\s*\)",
-        r"import\(\s*['\"]([^'\"]+)['\"]\s*\)"
-    ]
-    
-    for pattern in import_patterns:
-        matches = re.findall(pattern, content)
-        dependencies["imports"].extend(matches)
-    
-    func_patterns = [
-        r"function\s+(\w+)\s*\(",
-        r"const\s+(\w+)\s*=\s*function\s*\(",
-        r"const\s+(\w+)\s*=\s*\([^)]*\)\s*=>",
-        r"(\w+)\s*:\s*function\s*\(",
-        r"(\w+)\s*:\s*\([^)]*\)\s*=>"
-    ]
+    dependencies = _empty_code_dependencies()
     
-    for pattern in func_patterns:
-        matches = re.findall(pattern, content)
-        dependencies["functions"].extend(matches)
+    # Patterns overlap (e.g. a definition is also a call), so each keeps its own pass
+    for pattern in JS_IMPORT_PATTERNS:
+        dependencies["imports"].extend(pattern.findall(content))
     
-    class_matches = re.findall(r"class\s+(\w+)", content)
-    dependencies["classes"].extend(class_matches)
+    for pattern in JS_FUNCTION_PATTERNS:
+        dependencies["functions"].extend(pattern.findall(content))
     
-    call_matches = re.findall(r"(\w+)\s*\(", content)
-    dependencies["function_calls"].extend(call_matches)
+    dependencies["classes"].extend(JS_CLASS_PATTERN.findall(content))
+    dependencies["function_calls"].extend(CALL_PATTERN.findall(content))
     
     return dependencies
 
+def _scan(scanner, content, dependencies):
+    """Single pass of a language scanner, sorting named groups into dependency lists"""
+    for match in scanner.finditer(content):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "import":
+            dependencies["imports"].append(value)
+        elif kind == "import_block":
+            dependencies["imports"].extend(GO_BLOCK_IMPORT_PATTERN.findall(value))
+        elif kind == "function":
+            dependencies["functions"].append(value)
+        elif kind == "type":
+            dependencies["classes"].append(value)
+        elif kind == "call":
+            dependencies["function_calls"].append(value)
+        elif kind == "package":
+            dependencies["packages"].append(value)
+    return dependencies
+
+@register_extractor(".go")
+def extract_go_dependencies(content, file_path):
+    """Extract package, imports, funcs/methods, struct/interface types and calls from Go files"""
+    return _scan(GO_SCANNER, content, dict(_empty_code_dependencies(), packages=[]))
+
+@register_extractor(".java")
+def extract_java_dependencies(content, file_path):
+    """Extract package, imports, classes/interfaces/enums, methods and calls from Java files"""
+    return _scan(JAVA_SCANNER, content, dict(_empty_code_dependencies(), packages=[]))
+
+@register_extractor(".html")
 def extract_html_dependencies(content, file_path):
     """Extract dependencies from HTML files"""
     dependencies = {
@@ -92,20 +167,14 @@ def extract_html_dependencies(content, file_path):
         "file_references": []
     }
     
-    css_matches = re.findall(r'<link[^>]*href=["\']([^"\']+\.css)["\']', content, re.IGNORECASE)
-    dependencies["css_links"].extend(css_matches)
-    
-    js_matches = re.findall(r'<script[^>]*src=["\']([^"\']+\.js[^"\']*)["\']', content, re.IGNORECASE)
-    dependencies["js_links"].extend(js_matches)
-    
-    img_matches = re.findall(r'<img[^>]*src=["\']([^"\']+)["\']', content, re.IGNORECASE)
-    dependencies["image_links"].extend(img_matches)
-    
-    asset_matches = re.findall(r'href=["\']([^"\']+\.(png|jpg|jpeg|gif|svg|ico|woff|woff2|ttf|eot))["\']', content, re.IGNORECASE)
-    dependencies["other_links"].extend([match[0] for match in asset_matches])
+    dependencies["css_links"].extend(HTML_CSS_PATTERN.findall(content))
+    dependencies["js_links"].extend(HTML_JS_PATTERN.findall(content))
+    dependencies["image_links"].extend(HTML_IMG_PATTERN.findall(content))
+    dependencies["other_links"].extend([match[0] for match in HTML_ASSET_PATTERN.findall(content)])
     
     return dependencies
 
+@register_extractor(".css")
 def extract_css_dependencies(content, file_path):
     """Extract dependencies from CSS files"""
     dependencies = {
@@ -114,11 +183,8 @@ def extract_css_dependencies(content, file_path):
         "file_references": []
     }
     
-    import_matches = re.findall(r'@import\s+["\']([^"\']+)["\']', content)
-    dependencies["imports"].extend(import_matches)
-    
-    url_matches = re.findall(r'url\s*\(\s*["\']?([^"\')\s]+)["\']?\s*\)', content)
-    dependencies["url_references"].extend(url_matches)
+    dependencies["imports"].extend(CSS_IMPORT_PATTERN.findall(content))
+    dependencies["url_references"].extend(CSS_URL_PATTERN.findall(content))
     
     return dependencies
 
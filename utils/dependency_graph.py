@@ -0,0 +1,247 @@
+import os
+import networkx as nx
+from collections import defaultdict
+from utils.disk_cache import content_hash
+
+LINK_TYPES = ["css_links", "js_links", "image_links", "other_links"]
+# Relation kinds in increasing precedence, with the option that enables each
+RELATIONS = [
+    ("function_call", "show_function_calls"),
+    ("import", "show_imports"),
+    ("file_link", "show_file_links"),
+]
+
+
+def _hashable(items):
+    """Skip entries (e.g. from AI output) that can't be used as index keys"""
+    for item in items:
+        try:
+            hash(item)
+        except TypeError:
+            continue
+        yield item
+
+
+class NameIndex:
+    """Maps names to file paths and finds every indexed name contained in a string"""
+
+    def __init__(self):
+        self.paths = defaultdict(list)
+        self.lengths = set()
+
+    def add(self, name, path):
+        self.paths[name].append(path)
+        self.lengths.add(len(name))
+
+    def find_in(self, text):
+        """Yield paths whose indexed name is a substring of text"""
+        found = set()
+        for length in self.lengths:
+            for start in range(len(text) - length + 1):
+                name = text[start:start + length]
+                if name in found:
+                    continue
+                if name in self.paths:
+                    found.add(name)
+                    yield from self.paths[name]
+
+
+class DependencyIndex:
+    """Precomputed symbol, module and asset lookups for resolving edges"""
+
+    def __init__(self, file_paths, file_dependencies):
+        self.order = {path: i for i, path in enumerate(file_paths)}
+        self.modules = NameIndex()
+        self.assets = NameIndex()
+        # symbol -> [(defining file, last position in that file's functions)]
+        self.symbols = defaultdict(list)
+
+        for path in file_paths:
+            basename = os.path.basename(path)
+            self.modules.add(os.path.splitext(basename)[0], path)
+            self.assets.add(basename, path)
+
+            positions = {}
+            for pos, func in enumerate(file_dependencies.get(path, {}).get("functions", [])):
+                try:
+                    positions[func] = pos
+                except TypeError:
+                    continue
+            for func, pos in positions.items():
+                self.symbols[func].append((path, pos))
+
+    def resolve(self, file_path, deps):
+        """Return [(target, {relation: edge attributes})] for one file, in file order"""
+        edges = defaultdict(dict)
+
+        best = {}
+        for call in set(_hashable(deps.get("function_calls", []))):
+            for other_path, pos in self.symbols.get(call, ()):
+                if other_path != file_path and pos >= best.get(other_path, (-1,))[0]:
+                    best[other_path] = (pos, call)
+        for other_path, (_, func) in best.items():
+            edges[other_path]["function_call"] = {"edge_type": f"calls_function_{func}",
+                                                  "color": "#FF4444", "weight": 2}
+
+        for imp in deps.get("imports", []):
+            if not isinstance(imp, str):
+                continue
+            for other_path in self.modules.find_in(imp):
+                if other_path != file_path:
+                    edges[other_path]["import"] = {"edge_type": "imports",
+                                                   "color": "#4444FF", "weight": 3}
+
+        for link_type in LINK_TYPES:
+            for link in deps.get(link_type, []):
+                if not isinstance(link, str):
+                    continue
+                for other_path in self.assets.find_in(link):
+                    if other_path != file_path:
+                        edges[other_path]["file_link"] = {"edge_type": link_type.replace("_links", "_link"),
+                                                          "color": "#44FF44", "weight": 1}
+
+        return sorted(edges.items(), key=lambda item: self.order[item[0]])
+
+
+def pick_relation(relations, options):
+    """Attributes of the highest-precedence relation enabled by options (links > imports > calls)"""
+    attrs = None
+    for relation, option in RELATIONS:
+        if relation in relations and options.get(option, True):
+            attrs = relations[relation]
+    return attrs
+
+
+def build_full_graph(file_paths, repo_structure, file_dependencies, file_nodes):
+    """Build the superset graph: every node, folder edge and typed dependency edge"""
+    G = nx.DiGraph()
+
+    for directory in repo_structure["dirs"]:
+        if directory:
+            G.add_node(f"📁 {directory}", node_type="directory", color="#FFD700")
+
+    for file_path in file_paths:
+        attrs = file_nodes[file_path]
+        G.add_node(file_path, **attrs)
+        if attrs["directory"]:
+            dir_node = f"📁 {attrs['directory']}"
+            if dir_node not in G:
+                G.add_node(dir_node, node_type="directory", color="#FFD700")
+            G.add_edge(dir_node, file_path,
+                       edge_type="contains", color="#CCCCCC", relations={"contains": None})
+
+    index = DependencyIndex(file_paths, file_dependencies)
+    for file_path, deps in file_dependencies.items():
+        for other_path, relations in index.resolve(file_path, deps):
+            G.add_edge(file_path, other_path, relations=relations,
+                       **pick_relation(relations, {}))
+    return G
+
+
+def graph_hash(graph):
+    """Hash of the graph structure (node ids and edges), independent of insertion order"""
+    nodes = sorted(map(str, graph.nodes()))
+    edges = sorted(f"{source}\0{target}" for source, target in graph.edges())
+    return content_hash("\n".join(nodes), "\n".join(edges))
+
+
+def project_graph(full_graph, options):
+    """Cheap filtered view of the superset graph for the current visualization options"""
+    show_folders = options.get("show_folder_structure", False)
+    G = nx.DiGraph()
+
+    for node, data in full_graph.nodes(data=True):
+        if data.get("node_type") == "directory" and not show_folders:
+            continue
+        G.add_node(node, **data)
+
+    for source, target, data in full_graph.edges(data=True):
+        relations = data.get("relations", {})
+        if "contains" in relations:
+            if show_folders:
+                G.add_edge(source, target, edge_type="contains", color="#CCCCCC")
+            continue
+        attrs = pick_relation(relations, options)
+        if attrs:
+            G.add_edge(source, target, **attrs)
+
+    if options.get("min_connections", 0) > 0:
+        nodes_to_remove = [node for node in G.nodes()
+                           if G.degree(node) < options["min_connections"]]
+        G.remove_nodes_from(nodes_to_remove)
+
+    return G
+
+
+def _group_for(directory, focus_parts):
+    """Aggregate node directory for a file, or None when the file is shown individually
+
+    A file is grouped under the shortest prefix of its directory that is not the focus
+    directory or one of its ancestors; files directly in the focus (or an ancestor)
+    stay individual nodes.
+    """
+    parts = directory.split("/") if directory else []
+    for i in range(1, len(parts) + 1):
+        if parts[:i] != focus_parts[:i]:
+            return "/".join(parts[:i])
+    return None
+
+
+def aggregate_graph(graph, focus=None, max_nodes=500):
+    """Level-of-detail view: collapse directories outside `focus` into aggregate nodes
+
+    Edges between aggregates carry a `count` of the file-level edges they stand for.
+    If the view still exceeds max_nodes, the least connected nodes are merged into a
+    single overflow node, so the rendered size stays bounded.
+    """
+    focus_parts = focus.split("/") if focus else []
+    group_of = {}
+    groups = defaultdict(list)
+    for node, data in graph.nodes(data=True):
+        if data.get("node_type") == "directory":
+            continue
+        group = _group_for(data.get("directory", os.path.dirname(node)), focus_parts)
+        group_of[node] = f"📁 {group}/" if group is not None else node
+        if group is not None:
+            groups[group].append(node)
+
+    edge_counts = defaultdict(lambda: defaultdict(int))
+    for source, target, data in graph.edges(data=True):
+        if data.get("edge_type") == "contains" or source not in group_of or target not in group_of:
+            continue
+        u, v = group_of[source], group_of[target]
+        if u != v:
+            edge_counts[(u, v)][data.get("edge_type", "connected")] += 1
+
+    weight = defaultdict(int)
+    for (u, v), types in edge_counts.items():
+        weight[u] += sum(types.values())
+        weight[v] += sum(types.values())
+    view_nodes = set(group_of.values())
+    if len(view_nodes) > max_nodes:
+        keep = set(sorted(view_nodes, key=lambda n: (-weight[n], n))[:max_nodes - 1])
+        overflow = f"📦 {len(view_nodes) - len(keep)} more"
+        group_of = {node: (group if group in keep else overflow) for node, group in group_of.items()}
+        merged = defaultdict(lambda: defaultdict(int))
+        for (u, v), types in edge_counts.items():
+            u, v = (u if u in keep else overflow), (v if v in keep else overflow)
+            if u != v:
+                for edge_type, count in types.items():
+                    merged[(u, v)][edge_type] += count
+        edge_counts = merged
+
+    G = nx.DiGraph()
+    members = defaultdict(list)
+    for node, group in group_of.items():
+        members[group].append(node)
+    for group, files in members.items():
+        if group == files[0] and len(files) == 1 and group in graph:
+            G.add_node(group, **graph.nodes[group])
+        else:
+            G.add_node(group, node_type="aggregate", file_count=len(files),
+                       directory=group[2:].rstrip("/") if group.startswith("📁 ") else None,
+                       size=sum(graph.nodes[f].get("size", 0) or 0 for f in files))
+    for (u, v), types in edge_counts.items():
+        edge_type = max(types, key=types.get)
+        G.add_edge(u, v, edge_type=edge_type, count=sum(types.values()))
+    return G
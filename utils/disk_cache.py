@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.environ.get("CODE_COMPASS_CACHE_DIR", ".code_compass_cache")
+
+
+def content_hash(*parts):
+    """Stable sha256 over the given strings/bytes"""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8", errors="ignore")
+        h.update(part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class DiskCache:
+    """Small JSON-on-disk cache shared by every session in the process (and across runs)
+
+    With a byte budget, least recently used entries are deleted whenever writes take the
+    namespace over it. Sizes are tallied as this process writes, so the directory is only
+    walked when the budget looks exceeded.
+    """
+
+    def __init__(self, namespace, root=None, budget=None):
+        self.directory = os.path.join(root or CACHE_DIR, namespace)
+        self.budget = budget
+        self._size = None  # Bytes on disk as of the last walk plus what was written since
+        self._size_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key, default=None):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                value = json.load(f)
+            if self.budget is not None:
+                os.utime(self._path(key))  # Last use, for eviction
+            return value
+        except (OSError, ValueError):
+            return default
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see partial JSON
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self.budget is not None:
+            with self._size_lock:
+                if self._size is None:
+                    self._size = self.evict_lru()
+                else:
+                    self._size += size
+                    if self._size > self.budget:
+                        self._size = self.evict_lru()
+
+    def evict_lru(self):
+        """Delete least recently used entries until the namespace fits the budget; returns the bytes left
+
+        Eviction goes down to 90% of the budget so the next few writes don't walk again.
+        """
+        entries = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.budget * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        return total
@@ -0,0 +1,115 @@
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from langchain_community.vectorstores import FAISS
+
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", "4"))
+EMBED_MAX_RETRIES = int(os.environ.get("EMBED_MAX_RETRIES", "3"))
+
+
+class EmbeddingPipeline:
+    """Streams file chunks through concurrent embedding workers into a FAISS store
+
+    At most `max_pending` batches are in flight at once; the reader blocks until a
+    worker finishes, so memory is bounded by batch size rather than repository size.
+    """
+
+    def __init__(self, embedding_model, batch_size=None, max_workers=None, max_retries=None, base_delay=1.0):
+        self.embedding_model = embedding_model
+        self.batch_size = max(1, batch_size or EMBED_BATCH_SIZE)
+        self.max_workers = max(1, max_workers or EMBED_WORKERS)
+        self.max_pending = self.max_workers * 2
+        self.max_retries = EMBED_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embedding_model.embed_documents(texts)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.base_delay * (2 ** attempt) * (1 + random.random()))
+
+    def run(self, files, total_files=None, vectorstore=None, progress=None, on_added=None):
+        """Embed and index every chunk
+
+        files yields (file_key, [(chunk_id, text, metadata), ...]) one file at a time.
+        progress(done_files, total_files) and on_added(chunk_id, text) are called from the
+        calling thread.
+        Returns (vectorstore, {file_key: chunk ids}, failed file keys, rolled-back chunk ids).
+        A file whose batch failed after all retries is removed again so it is retried next run.
+        """
+        vs = vectorstore
+        added_ids = defaultdict(list)
+        remaining = {}
+        failed = set()
+        done_files = 0
+        pending = {}
+        batch = []
+
+        def file_finished():
+            nonlocal done_files
+            done_files += 1
+            if progress:
+                progress(done_files, total_files)
+
+        def collect(futures):
+            nonlocal vs
+            for future in futures:
+                items = pending.pop(future)
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    print(f"⚠️ Embedding batch failed: {e}")
+                    vectors = None
+                    failed.update(file_key for file_key, _, _, _ in items)
+                if vectors is not None:
+                    text_embeddings = [(text, vector) for (_, _, text, _), vector in zip(items, vectors)]
+                    metadatas = [metadata for _, _, _, metadata in items]
+                    ids = [chunk_id for _, chunk_id, _, _ in items]
+                    if vs is None:
+                        vs = FAISS.from_embeddings(text_embeddings, self.embedding_model, metadatas=metadatas, ids=ids)
+                    else:
+                        vs.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+                    for file_key, chunk_id, text, _ in items:
+                        added_ids[file_key].append(chunk_id)
+                        if on_added:
+                            on_added(chunk_id, text)
+                for file_key, _, _, _ in items:
+                    remaining[file_key] -= 1
+                    if remaining[file_key] == 0:
+                        file_finished()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            def submit():
+                future = pool.submit(self._embed_batch, [text for _, _, text, _ in batch])
+                pending[future] = list(batch)
+                batch.clear()
+                # Back-pressure: stop reading until a worker frees a slot
+                while len(pending) >= self.max_pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+
+            for file_key, chunks in files:
+                remaining[file_key] = len(chunks)
+                if not chunks:
+                    file_finished()
+                for chunk_id, text, metadata in chunks:
+                    batch.append((file_key, chunk_id, text, metadata))
+                    if len(batch) >= self.batch_size:
+                        submit()
+            if batch:
+                submit()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        stale_ids = [chunk_id for file_key in failed for chunk_id in added_ids.pop(file_key, [])]
+        if stale_ids:
+            vs.delete(stale_ids)
+        file_ids = {file_key: added_ids.get(file_key, []) for file_key in remaining if file_key not in failed}
+        return vs, file_ids, failed, stale_ids
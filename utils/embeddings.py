@@ -0,0 +1,84 @@
+import re
+import zlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_BACKENDS = ["auto", "google", "local"]
+TOKEN_PATTERN = re.compile(r"[A-Za-z][a-z]+|[A-Z]+(?![a-z])|\d+|[^\sA-Za-z\d]")
+
+
+def code_tokens(text):
+    """Lowercased identifiers plus their camelCase/snake_case parts"""
+    for word in re.findall(r"\w+", text):
+        yield word.lower()
+        parts = TOKEN_PATTERN.findall(word.replace("_", " "))
+        if len(parts) > 1:
+            for part in parts:
+                yield part.lower()
+
+
+class HashingEmbeddings(Embeddings):
+    """CPU-only embeddings via feature hashing, for offline or keyless indexing
+
+    Tokens (identifiers split on camelCase/snake_case, plus whole identifiers so exact
+    names still match) are hashed into `dim` signed buckets with sublinear term
+    frequency and L2 normalization. A whole batch is one NumPy scatter-add, and the
+    output is deterministic across processes, so stored indexes stay valid.
+    """
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+        self.model_id = f"local/hashing-v1-{dim}"
+        self._buckets = {}
+
+    def _bucket(self, token):
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            h = zlib.crc32(token.encode("utf-8"))
+            bucket = (h % self.dim, 1.0 if (h >> 31) & 1 else -1.0)
+            self._buckets[token] = bucket
+        return bucket
+
+    def _vectorize(self, texts):
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in code_tokens(text):
+                col, sign = self._bucket(token)
+                rows.append(row)
+                cols.append(col)
+                signs.append(sign)
+
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(counts, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)),
+                  np.asarray(signs, dtype=np.float32))
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def embed_documents(self, texts):
+        return self._vectorize(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._vectorize([text])[0].tolist()
+
+
+def get_embedding_backend(backend="auto", google_api_key=None):
+    """Return (embedding model, model id) for the chosen backend, or (None, None)"""
+    if backend == "auto":
+        backend = "google" if google_api_key else "local"
+
+    if backend == "google":
+        if not google_api_key:
+            return None, None
+        import google.generativeai as genai
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        genai.configure(api_key=google_api_key)
+        model = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=google_api_key)
+        return model, "google/models/embedding-001"
+
+    if backend == "local":
+        model = HashingEmbeddings()
+        return model, model.model_id
+
+    raise ValueError(f"Unknown embedding backend: {backend}")
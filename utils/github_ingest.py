@@ -0,0 +1,146 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from utils.disk_cache import DiskCache, content_hash
+from utils.repo_walker import IGNORED_DIRS, is_binary_data
+
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_FETCH_WORKERS = int(os.environ.get("GITHUB_FETCH_WORKERS", "16"))
+MAX_CONTENT_SIZE = 1000000  # Same limit the directory-by-directory ingestion uses
+REQUEST_TIMEOUT = 30
+# Trees and blobs are cached on disk; least recently used entries go beyond this size
+GITHUB_CACHE_BUDGET_BYTES = int(os.environ.get("CODE_COMPASS_GITHUB_CACHE_MB", "256")) * 1024 * 1024
+RATE_LIMIT_STATUSES = (403, 429)
+
+
+class TreeTruncated(Exception):
+    """GitHub returned a partial recursive tree (very large repositories)"""
+
+
+class RateLimited(Exception):
+    """GitHub refused further requests (403/429); the remaining blobs would fail the same way"""
+
+
+class GitHubTreeClient:
+    """Remote ingestion through the Git Trees API
+
+    One recursive tree request lists every file; blobs are then downloaded concurrently
+    over a pooled keep-alive session. Tree responses are revalidated with ETags, and
+    blobs, which never change for a given sha, are cached on disk by sha.
+    """
+
+    def __init__(self, token=None, api_url=None, workers=None):
+        self.api_url = (api_url or GITHUB_API_URL).rstrip("/")
+        self.workers = workers or GITHUB_FETCH_WORKERS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": "application/vnd.github+json", "User-Agent": "code-compass"})
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+        self.cache = DiskCache("github_api", budget=GITHUB_CACHE_BUDGET_BYTES)
+
+    def get_json(self, path):
+        """GET with If-None-Match; a 304 is served from the cache and does not count against the rate limit"""
+        url = f"{self.api_url}{path}"
+        key = content_hash("json", url)
+        cached = self.cache.get(key)
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and cached:
+            return cached["body"]
+        response.raise_for_status()
+        body = response.json()
+        if response.headers.get("ETag"):
+            self.cache.set(key, {"etag": response.headers["ETag"], "body": body})
+        return body
+
+    def get_tree(self, owner, repo, ref="HEAD"):
+        tree = self.get_json(f"/repos/{owner}/{repo}/git/trees/{ref}?recursive=1")
+        if tree.get("truncated"):
+            raise TreeTruncated(f"{owner}/{repo}@{ref}")
+        return tree["tree"]
+
+    def get_blob(self, owner, repo, sha):
+        """Decoded text of a blob, or "" for binary content"""
+        key = content_hash("blob", sha)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.session.get(f"{self.api_url}/repos/{owner}/{repo}/git/blobs/{sha}",
+                                    headers={"Accept": "application/vnd.github.raw"}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.content
+        content = "" if is_binary_data(data) else data.decode("utf-8", errors="ignore")
+        self.cache.set(key, content)
+        return content
+
+    def fetch_repo(self, owner, repo, ref="HEAD", extensions=None, progress=None):
+        """(files, repo_structure) like get_repo_contents, from one tree request plus parallel blob fetches
+
+        Every file is listed; content is only downloaded for files under MAX_CONTENT_SIZE
+        whose extension is in `extensions` (all files when None). Raises RateLimited as soon
+        as GitHub refuses a request; other failed downloads are counted in
+        repo_structure["incomplete"].
+        """
+        contents = []
+        repo_structure = {"dirs": set(), "files": []}
+        to_fetch = []
+
+        for entry in self.get_tree(owner, repo, ref):
+            path = entry["path"]
+            parts = path.split("/")
+            if any(part in IGNORED_DIRS for part in parts):
+                continue
+            if entry["type"] == "tree":
+                repo_structure["dirs"].add(path)
+            elif entry["type"] == "blob":
+                file_info = {
+                    "name": parts[-1],
+                    "path": path,
+                    "content": "",
+                    "size": entry.get("size", 0),
+                    "download_url": None,
+                    "directory": os.path.dirname(path)
+                }
+                contents.append(file_info)
+                repo_structure["files"].append(file_info)
+                extension = os.path.splitext(path)[1].lower()
+                if file_info["size"] < MAX_CONTENT_SIZE and (extensions is None or extension in extensions):
+                    to_fetch.append((file_info, entry["sha"]))
+
+        done = 0
+        failed = []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def fetch(item):
+            nonlocal done
+            file_info, sha = item
+            if stop.is_set():
+                return
+            try:
+                file_info["content"] = self.get_blob(owner, repo, sha)
+            except requests.RequestException as e:
+                status = getattr(e.response, "status_code", None)
+                if status in RATE_LIMIT_STATUSES:
+                    stop.set()
+                    raise RateLimited(f"GitHub answered {status} for {file_info['path']}") from e
+                print(f"⚠️ Could not fetch {file_info['path']}: {e}")
+                with lock:
+                    failed.append(file_info["path"])
+            with lock:
+                done += 1
+                if progress:
+                    progress(done, len(to_fetch))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(fetch, to_fetch))
+
+        if failed:
+            repo_structure["incomplete"] = len(failed)
+        print(f"🌐 Listed {len(contents)} files in one tree request, read {len(to_fetch) - len(failed)}/{len(to_fetch)} blobs")
+        return contents, repo_structure
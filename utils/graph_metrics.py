@@ -0,0 +1,120 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import networkx as nx
+from collections import OrderedDict
+from utils.dependency_graph import graph_hash
+
+# Exact betweenness is O(n·m); above this size it is estimated from sampled sources
+BETWEENNESS_EXACT_MAX_NODES = int(os.environ.get("BETWEENNESS_EXACT_MAX_NODES", "300"))
+BETWEENNESS_SAMPLES = 100
+MAX_CYCLES_SHOWN = 10
+MAX_CACHED_METRICS = 16
+
+_metrics_cache = OrderedDict()  # graph hash -> GraphMetrics
+_metrics_lock = threading.Lock()
+
+
+def pagerank(n, sources, targets, alpha=0.85, tol=1e-8, max_iter=100):
+    """PageRank by power iteration over edge arrays (no scipy needed)"""
+    if n == 0:
+        return np.zeros(0)
+    out_degree = np.bincount(sources, minlength=n).astype(float)
+    dangling = out_degree == 0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(targets, weights=rank[sources] / out_degree[sources], minlength=n)
+        new_rank = alpha * (spread + rank[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(new_rank - rank).sum() < n * tol:
+            return new_rank
+        rank = new_rank
+    return rank
+
+
+class GraphMetrics:
+    """Per-node metrics table for one graph plus graph-level summaries
+
+    `nodes` has one row per node: is_directory, file_type, in/out/total degree,
+    pagerank, betweenness and weakly connected component id.
+    """
+
+    def __init__(self, graph):
+        node_ids = list(graph.nodes())
+        n = len(node_ids)
+        index = {node: i for i, node in enumerate(node_ids)}
+        edges = np.array([(index[s], index[t]) for s, t in graph.edges()], dtype=np.int64).reshape(-1, 2)
+        sources, targets = edges[:, 0], edges[:, 1]
+
+        in_degree = np.bincount(targets, minlength=n)
+        out_degree = np.bincount(sources, minlength=n)
+        component = np.zeros(n, dtype=np.int64)
+        for i, members in enumerate(nx.weakly_connected_components(graph)):
+            component[[index[node] for node in members]] = i
+
+        if n <= BETWEENNESS_EXACT_MAX_NODES:
+            betweenness = nx.betweenness_centrality(graph)
+        else:
+            betweenness = nx.betweenness_centrality(graph, k=BETWEENNESS_SAMPLES, seed=42)
+
+        names = pd.Series(node_ids, dtype=object)
+        is_directory = names.str.startswith("📁").to_numpy(dtype=bool)
+        extensions = names.map(lambda node: os.path.splitext(node)[1] or "no extension")
+
+        self.nodes = pd.DataFrame({
+            "is_directory": is_directory,
+            "file_type": extensions.where(~is_directory, None).to_numpy(),
+            "in_degree": in_degree,
+            "out_degree": out_degree,
+            "degree": in_degree + out_degree,  # a self-loop counts twice, as in graph.degree
+            "pagerank": pagerank(n, sources, targets),
+            "betweenness": [betweenness[node] for node in node_ids],
+            "component": component,
+        }, index=pd.Index(node_ids, name="node"))
+
+        files = self.nodes[~self.nodes["is_directory"]]
+        self.total_nodes = n
+        self.total_edges = len(edges)
+        self.file_count = len(files)
+        self.connected_nodes = int((self.nodes["degree"] > 0).sum())
+        self.avg_degree = float(self.nodes["degree"].sum()) / n if n else 0.0
+        self.components = int(component.max()) + 1 if n else 0
+        self.file_types = files["file_type"].value_counts(sort=False)
+
+        # Strongly connected components with more than one file are dependency cycles
+        cyclic = sorted((c for c in nx.strongly_connected_components(graph) if len(c) > 1), key=len, reverse=True)
+        self.cyclic_files = sum(len(c) for c in cyclic)
+        self.cycle_count = len(cyclic)
+        self.cycles = []
+        for members in cyclic[:MAX_CYCLES_SHOWN]:
+            cycle = nx.find_cycle(graph.subgraph(members))
+            self.cycles.append([source for source, _ in cycle] + [cycle[0][0]])
+
+        self._figures = {}
+
+    def top_files(self, column, limit=10):
+        """Non-directory rows with the highest value in `column`"""
+        files = self.nodes[~self.nodes["is_directory"]]
+        return files.nlargest(limit, column, keep="first")
+
+    def figure(self, name, build):
+        """Plot built once per metrics table"""
+        if name not in self._figures:
+            self._figures[name] = build()
+        return self._figures[name]
+
+
+def get_graph_metrics(graph):
+    """GraphMetrics for a graph, computed once per graph structure and shared by sessions"""
+    key = graph_hash(graph)
+    with _metrics_lock:
+        metrics = _metrics_cache.get(key)
+        if metrics is not None:
+            _metrics_cache.move_to_end(key)
+            return metrics
+    metrics = GraphMetrics(graph)
+    with _metrics_lock:
+        _metrics_cache[key] = metrics
+        while len(_metrics_cache) > MAX_CACHED_METRICS:
+            _metrics_cache.popitem(last=False)
+    return metrics
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import subprocess
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2  # v2: lexical (BM25) index stored alongside
+
+
+def blob_hash(file_path):
+    """Git blob id (sha1 of "blob <size>\\0<data>") computed without calling git"""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _git_ls_files(repo_path, *args):
+    output = subprocess.run(
+        ["git", "-C", repo_path, "ls-files", "-z", *args],
+        check=True, capture_output=True
+    ).stdout
+    return [entry for entry in output.decode("utf-8", errors="ignore").split("\0") if entry]
+
+
+def git_blob_hashes(repo_path):
+    """Map of repo-relative path -> blob id for tracked files whose working copy is unmodified"""
+    try:
+        staged = _git_ls_files(repo_path, "-s")
+        modified = set(_git_ls_files(repo_path, "-m"))
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+    hashes = {}
+    for entry in staged:
+        meta, path = entry.split("\t", 1)
+        if path not in modified:
+            hashes[path] = meta.split()[1]
+    return hashes
+
+
+def load_manifest(index_dir):
+    """Manifest {"files": {path: {"blob", "ids"}}} stored next to the index, or None"""
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(index_dir, manifest):
+    manifest["version"] = MANIFEST_VERSION
+    tmp_path = os.path.join(index_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(index_dir, MANIFEST_FILE))
+
+
+def diff_manifest(manifest, current_hashes):
+    """Return (paths to embed, paths whose vectors must be deleted)"""
+    indexed = manifest.get("files", {}) if manifest else {}
+    to_embed = [path for path, blob in current_hashes.items()
+                if indexed.get(path, {}).get("blob") != blob]
+    to_delete = [path for path, entry in indexed.items()
+                 if current_hashes.get(path) != entry.get("blob")]
+    return to_embed, to_delete
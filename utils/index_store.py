@@ -0,0 +1,107 @@
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+
+INDEX_BUDGET_BYTES = int(os.environ.get("CODE_COMPASS_INDEX_BUDGET_MB", "2048")) * 1024 * 1024
+LAST_USED_FILE = ".last_used"
+
+
+def _safe(name):
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def model_tag(model_id):
+    return hashlib.sha1(model_id.encode("utf-8")).hexdigest()[:10]
+
+
+def index_dir_for(root, owner, repo, commit, model_id):
+    """Namespace for one owner/repo@commit indexed with one embedding model"""
+    return os.path.join(root, f"{_safe(owner)}__{_safe(repo)}", f"{commit}__{model_tag(model_id)}")
+
+
+def is_built(index_dir):
+    return os.path.exists(os.path.join(index_dir, "index.faiss")) and \
+        os.path.exists(os.path.join(index_dir, "manifest.json"))
+
+
+def touch(index_dir):
+    """Record a use of this namespace for LRU eviction; False if it has been evicted meanwhile"""
+    try:
+        with open(os.path.join(index_dir, LAST_USED_FILE), "w") as f:
+            f.write(str(time.time()))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def last_used(index_dir):
+    try:
+        return os.path.getmtime(os.path.join(index_dir, LAST_USED_FILE))
+    except OSError:
+        return 0.0
+
+
+def dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _namespaces(root):
+    if not os.path.isdir(root):
+        return []
+    found = []
+    for repo_entry in os.scandir(root):
+        if not repo_entry.is_dir() or "__" not in repo_entry.name:
+            continue
+        for entry in os.scandir(repo_entry.path):
+            if entry.is_dir() and is_built(entry.path):
+                found.append(entry.path)
+    return found
+
+
+def prepare_build_dir(index_dir):
+    """Private work dir seeded from the most recently used index of the same repo and model
+
+    Seeding lets build_vectorstore embed only the files that changed between commits.
+    """
+    work_dir = f"{index_dir}.tmp-{uuid.uuid4().hex[:8]}"
+    repo_dir = os.path.dirname(index_dir)
+    tag = os.path.basename(index_dir).rsplit("__", 1)[-1]
+    siblings = [path for path in _namespaces(os.path.dirname(repo_dir))
+                if os.path.dirname(path) == repo_dir and path.endswith(f"__{tag}")]
+    if siblings:
+        shutil.copytree(max(siblings, key=last_used), work_dir)
+    else:
+        os.makedirs(work_dir)
+    return work_dir
+
+
+def publish(work_dir, index_dir):
+    """Atomically move a finished build into place; another session may have won the race"""
+    try:
+        os.rename(work_dir, index_dir)
+    except OSError:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    touch(index_dir)
+
+
+def evict_lru(root, budget=INDEX_BUDGET_BYTES, keep=None):
+    """Delete least recently used namespaces until the total size fits the budget"""
+    entries = [(last_used(path), path, dir_size(path)) for path in _namespaces(root)]
+    total = sum(size for _, _, size in entries)
+    for _, path, size in sorted(entries):
+        if total <= budget:
+            break
+        if keep and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import networkx as nx
+from utils.disk_cache import DiskCache, content_hash
+from utils.dependency_graph import graph_hash
+
+LAYOUT_VERSION = "1"
+# Above this many nodes the O(n²) networkx layouts are replaced by the sampled NumPy one
+LAYOUT_EXACT_MAX_NODES = int(os.environ.get("LAYOUT_EXACT_MAX_NODES", "500"))
+LAYOUT_ITERATIONS = 60
+REPULSION_SAMPLES = 128
+LAYOUT_SEED = 42
+
+_layout_cache = None
+
+
+def _cache():
+    global _layout_cache
+    if _layout_cache is None:
+        _layout_cache = DiskCache("layouts")
+    return _layout_cache
+
+
+def force_layout(graph, iterations=LAYOUT_ITERATIONS, samples=REPULSION_SAMPLES, seed=LAYOUT_SEED):
+    """Fruchterman-Reingold in NumPy with sampled repulsion: O(n·samples + edges) per iteration
+
+    Attraction is exact along edges; repulsion is estimated from a fresh random sample of
+    nodes each iteration and rescaled, so memory stays linear in the number of nodes.
+    """
+    nodes = list(graph.nodes())
+    n = len(nodes)
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-1.0, 1.0, size=(n, 2)).astype(np.float32)
+    if n <= 1:
+        return {node: tuple(p) for node, p in zip(nodes, pos * 0)}
+
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[s], index[t]) for s, t in graph.edges() if s != t], dtype=np.int64).reshape(-1, 2)
+    k = 1.0 / np.sqrt(n)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    samples = min(samples, n)
+
+    for _ in range(iterations):
+        sample = rng.choice(n, size=samples, replace=False)
+        delta = pos[:, None, :] - pos[sample][None, :, :]
+        dist_sq = np.maximum(np.einsum("ijk,ijk->ij", delta, delta), 1e-6)
+        displacement = np.einsum("ijk,ij->ik", delta, (k * k) / dist_sq) * (n / samples)
+
+        if len(edges):
+            edge_delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            edge_dist = np.sqrt(np.maximum((edge_delta ** 2).sum(axis=1), 1e-9))
+            pull = edge_delta * (edge_dist / k)[:, None]
+            np.add.at(displacement, edges[:, 0], -pull)
+            np.add.at(displacement, edges[:, 1], pull)
+
+        length = np.sqrt(np.maximum((displacement ** 2).sum(axis=1), 1e-9))
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    scale = np.abs(pos).max() or 1.0
+    return {node: tuple(p) for node, p in zip(nodes, pos / scale)}
+
+
+def _compute_layout(graph, layout_type):
+    exact = graph.number_of_nodes() <= LAYOUT_EXACT_MAX_NODES
+    if layout_type == "circular":
+        return nx.circular_layout(graph)
+    if layout_type == "shell":
+        return nx.shell_layout(graph)
+    if layout_type == "random":
+        return nx.random_layout(graph, seed=LAYOUT_SEED)
+    if layout_type == "kamada_kawai" and exact:
+        try:
+            return nx.kamada_kawai_layout(graph)
+        except ImportError:  # needs scipy
+            pass
+    if exact:
+        return nx.spring_layout(graph, k=1, iterations=50, seed=LAYOUT_SEED)
+    return force_layout(graph)
+
+
+def compute_layout(graph, layout_type="spring"):
+    """{node: (x, y)} in roughly [-1, 1], computed once per graph structure and layout type"""
+    key = content_hash(LAYOUT_VERSION, layout_type, graph_hash(graph))
+    cached = _cache().get(key)
+    if cached is not None and all(str(node) in cached for node in graph.nodes()):
+        return {node: tuple(cached[str(node)]) for node in graph.nodes()}
+
+    pos = {node: (float(p[0]), float(p[1])) for node, p in _compute_layout(graph, layout_type).items()}
+    _cache().set(key, {str(node): xy for node, xy in pos.items()})
+    return pos
@@ -0,0 +1,82 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("LLM_MAX_WORKERS", "4"))
+DEFAULT_REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", "60"))
+DEFAULT_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "5"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 responses from OpenAI-compatible clients"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+def retry_after_seconds(error):
+    """Retry-After header of a 429 response, if the server sent one"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMExecutor:
+    """Bounded concurrent runner for LLM requests with rate limiting and 429 backoff"""
+
+    def __init__(self, max_workers=None, requests_per_minute=None, max_retries=None, base_delay=1.0):
+        self.max_workers = max(1, max_workers or DEFAULT_MAX_WORKERS)
+        rpm = requests_per_minute or DEFAULT_REQUESTS_PER_MINUTE
+        self.bucket = TokenBucket(rpm / 60.0, capacity=max(1, self.max_workers))
+        self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay
+
+    def call(self, request):
+        """Run request() under the rate limit, retrying 429s with exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return request()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = self.base_delay * (2 ** attempt) * (1 + random.random())
+                time.sleep(delay)
+
+    def map(self, fn, items):
+        """Apply fn to every item concurrently; results keep the input order"""
+        items = list(items)
+        if len(items) <= 1 or self.max_workers == 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
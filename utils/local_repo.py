@@ -0,0 +1,72 @@
+import os
+from utils.repo_walker import IGNORED_DIRS, walk_repository, is_binary_data
+from utils.repo_cache import files_not_checked_out
+
+MAX_CONTENT_SIZE = 1000000  # Same limit the GitHub ingestion uses for decoding
+
+
+class LocalRepoFile(dict):
+    """File record that reads its content from disk on first access"""
+
+    def __init__(self, full_path, **fields):
+        super().__init__(**fields)
+        self.full_path = full_path
+
+    def __missing__(self, key):
+        if key != "content":
+            raise KeyError(key)
+        content = ""
+        if self["size"] < MAX_CONTENT_SIZE:
+            try:
+                with open(self.full_path, "rb") as f:
+                    data = f.read()
+                if not is_binary_data(data):
+                    content = data.decode("utf-8", errors="ignore")
+            except OSError:
+                pass
+        self["content"] = content
+        return content
+
+    def get(self, key, default=None):
+        if key == "content":
+            return self["content"]
+        return super().get(key, default)
+
+
+def scan_local_repo(repo_path):
+    """Scan a local checkout once and return (files, repo_structure) like get_repo_contents"""
+    contents = []
+    repo_structure = {"dirs": set(), "files": []}
+
+    for walked in walk_repository(repo_path, on_dir=repo_structure["dirs"].add):
+        file_info = LocalRepoFile(
+            walked.path,
+            name=walked.name,
+            path=walked.rel_path,
+            size=walked.size,
+            download_url=None,
+            directory=walked.directory
+        )
+        contents.append(file_info)
+        repo_structure["files"].append(file_info)
+
+    # A sparse checkout only has the files analysis reads; list the rest from git
+    for rel_path, size in files_not_checked_out(repo_path):
+        parts = rel_path.split("/")
+        if any(part in IGNORED_DIRS for part in parts):
+            continue
+        directory = "/".join(parts[:-1])
+        for i in range(1, len(parts)):
+            repo_structure["dirs"].add("/".join(parts[:i]))
+        file_info = LocalRepoFile(
+            os.path.join(repo_path, rel_path),
+            name=parts[-1],
+            path=rel_path,
+            size=size,
+            download_url=None,
+            directory=directory
+        )
+        contents.append(file_info)
+        repo_structure["files"].append(file_info)
+
+    return contents, repo_structure
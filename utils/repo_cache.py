@@ -0,0 +1,259 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+import weakref
+from utils.disk_cache import CACHE_DIR, content_hash
+from utils.index_store import dir_size
+
+try:
+    import fcntl
+except ImportError:  # Without flock, worktrees left by other processes are never pruned
+    fcntl = None
+
+REPO_CACHE_DIR = os.environ.get("CODE_COMPASS_REPO_CACHE", os.path.join(CACHE_DIR, "repos"))
+REPO_CACHE_BUDGET_BYTES = int(os.environ.get("CODE_COMPASS_REPO_CACHE_MB", "2048")) * 1024 * 1024
+LAST_USED_FILE = "code_compass_last_used"
+GIT_TIMEOUT = 600
+
+_mirror_locks = {}
+_mirror_locks_guard = threading.Lock()
+_checkout_locks = {}
+_checkouts = weakref.WeakValueDictionary()  # (mirror, commit) -> live RepoCheckout
+_checkouts_lock = threading.Lock()
+_owner_token = uuid.uuid4().hex[:16]
+_owner_file = None  # Kept open and locked for the life of the process
+_owner_guard = threading.Lock()
+
+
+class RepoCheckout(str):
+    """Worktree path handed to sessions
+
+    Sessions asking for the same commit share one checkout. When the last reference is
+    dropped (or the process exits) the worktree is removed from disk.
+    """
+
+
+def _git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True,
+                          timeout=GIT_TIMEOUT).stdout.strip()
+
+
+def _mirror_lock(mirror):
+    with _mirror_locks_guard:
+        return _mirror_locks.setdefault(mirror, threading.Lock())
+
+
+def _checkout_lock(mirror, sha):
+    with _mirror_locks_guard:
+        return _checkout_locks.setdefault((mirror, sha), threading.Lock())
+
+
+def _owner_path(token):
+    return os.path.join(REPO_CACHE_DIR, "owners", f"{token}.lock")
+
+
+def _claim_owner():
+    """Create this process's owner file, locked until the process exits
+
+    Worktree names start with the owner token. The lock is released by the OS however the
+    process ends, so unlike a PID it cannot be mistaken for a live owner after a restart
+    or in another container. The file is locked before it is renamed into place, so no
+    other process ever sees it unlocked.
+    """
+    global _owner_file
+    path = _owner_path(_owner_token)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    _owner_file = open(tmp_path, "w")
+    if fcntl:
+        fcntl.flock(_owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    os.rename(tmp_path, path)
+
+
+def _owner_alive(token):
+    if token == _owner_token or fcntl is None:
+        return True
+    try:
+        fd = os.open(_owner_path(token), os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
+
+
+def _touch(mirror):
+    with open(os.path.join(mirror, LAST_USED_FILE), "w") as f:
+        f.write(str(time.time()))
+
+
+def _last_used(mirror):
+    try:
+        return os.path.getmtime(os.path.join(mirror, LAST_USED_FILE))
+    except OSError:
+        return 0.0
+
+
+def _has_commit(mirror, commit):
+    """True if a ref in the mirror points at commit
+
+    Refs are checked instead of objects: looking up a missing object in a partial clone
+    would quietly fetch it, one object at a time.
+    """
+    return commit in _git("-C", mirror, "for-each-ref", "--format=%(objectname)").split()
+
+
+def _remove_worktree(mirror, path):
+    try:
+        _git("-C", mirror, "worktree", "remove", "--force", path)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _prune_dead_worktrees():
+    """Remove worktrees left behind by processes that exited without cleaning up"""
+    worktree_root = os.path.join(REPO_CACHE_DIR, "worktrees")
+    if os.path.isdir(worktree_root):
+        for entry in os.scandir(worktree_root):
+            if not _owner_alive(entry.name.split("-", 1)[0]):
+                shutil.rmtree(entry.path, ignore_errors=True)
+    owner_root = os.path.join(REPO_CACHE_DIR, "owners")
+    if os.path.isdir(owner_root):
+        for entry in os.scandir(owner_root):
+            token = entry.name[:-len(".lock")]
+            if entry.name.endswith(".lock") and not _owner_alive(token):
+                os.remove(entry.path)
+    # Drops the mirrors' records of the removed worktrees, which would otherwise block eviction
+    mirror_root = os.path.join(REPO_CACHE_DIR, "mirrors")
+    if os.path.isdir(mirror_root):
+        for entry in os.scandir(mirror_root):
+            try:
+                _git("-C", entry.path, "worktree", "prune")
+            except (OSError, subprocess.SubprocessError):
+                pass
+
+
+def update_mirror(repo_url, commit=None):
+    """Bare, blob-less mirror of repo_url that contains `commit` (or the remote HEAD); returns (mirror, sha)"""
+    mirror = os.path.join(REPO_CACHE_DIR, "mirrors", content_hash(repo_url)[:16] + ".git")
+    with _mirror_lock(mirror):
+        created = False
+        if not os.path.isdir(mirror):
+            os.makedirs(os.path.dirname(mirror), exist_ok=True)
+            tmp_mirror = f"{mirror}.tmp-{uuid.uuid4().hex[:8]}"
+            try:
+                # Trees and commits only; blobs are fetched on demand by the sparse checkout
+                _git("clone", "--bare", "--filter=blob:none", "--depth", "1", repo_url, tmp_mirror)
+                os.rename(tmp_mirror, mirror)
+            finally:
+                shutil.rmtree(tmp_mirror, ignore_errors=True)
+            created = True
+            print(f"🪞 Created mirror for {repo_url}")
+
+        if commit and _has_commit(mirror, commit):
+            sha = commit
+            if not created:
+                print(f"♻️ Mirror already has {commit[:12]}")
+        elif created and not commit:
+            sha = _git("-C", mirror, "rev-parse", "HEAD")
+        else:
+            try:
+                _git("-C", mirror, "fetch", "--depth", "1", "--filter=blob:none", "origin", commit or "HEAD")
+            except subprocess.CalledProcessError:
+                if not commit:
+                    raise
+                # Some servers refuse fetching by sha; the remote HEAD is the next best thing
+                _git("-C", mirror, "fetch", "--depth", "1", "--filter=blob:none", "origin", "HEAD")
+            sha = _git("-C", mirror, "rev-parse", "FETCH_HEAD")
+            # A bare clone does not update its branches on fetch; keep the commit findable
+            _git("-C", mirror, "update-ref", f"refs/fetched/{sha}", sha)
+            print(f"🔄 Fetched {sha[:12]} into mirror")
+        _touch(mirror)
+    return mirror, sha
+
+
+def checkout(repo_url, commit=None, extensions=None):
+    """RepoCheckout of repo_url at commit, with only files matching `extensions` on disk
+
+    The worktree is sparse: other files stay in the mirror and are listed with
+    `git ls-tree` by the caller if needed.
+    """
+    with _owner_guard:
+        if _owner_file is None:
+            _claim_owner()
+            _prune_dead_worktrees()
+
+    mirror, sha = update_mirror(repo_url, commit)
+    # Sessions asking for the same commit wait for one checkout; other commits proceed in parallel
+    with _checkout_lock(mirror, sha):
+        with _checkouts_lock:
+            existing = _checkouts.get((mirror, sha))
+        if existing is not None:
+            return existing
+
+        path = os.path.join(REPO_CACHE_DIR, "worktrees", f"{_owner_token}-{sha[:12]}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _mirror_lock(mirror):
+            _git("-C", mirror, "worktree", "add", "--no-checkout", "--detach", path, sha)
+        try:
+            if extensions is not None:
+                patterns = [f"*{ext}" for ext in sorted(extensions)] + [".gitignore"]
+                _git("sparse-checkout", "set", "--no-cone", *patterns, cwd=path)
+            _git("checkout", "--detach", sha, cwd=path)
+        except Exception:
+            _remove_worktree(mirror, path)
+            raise
+
+        repo_checkout = RepoCheckout(path)
+        weakref.finalize(repo_checkout, _remove_worktree, mirror, path)
+        with _checkouts_lock:
+            _checkouts[(mirror, sha)] = repo_checkout
+
+    evict_mirrors(keep=mirror)
+    return repo_checkout
+
+
+def evict_mirrors(budget=REPO_CACHE_BUDGET_BYTES, keep=None):
+    """Delete least recently used mirrors until mirrors and worktrees fit the budget
+
+    Mirrors with a worktree checked out (by any process) are never deleted.
+    """
+    mirror_root = os.path.join(REPO_CACHE_DIR, "mirrors")
+    if not os.path.isdir(mirror_root):
+        return
+    mirrors = [entry.path for entry in os.scandir(mirror_root) if entry.is_dir() and entry.name.endswith(".git")]
+    entries = [(_last_used(path), path, dir_size(path)) for path in mirrors]
+    total = sum(size for _, _, size in entries) + dir_size(os.path.join(REPO_CACHE_DIR, "worktrees"))
+    for _, path, size in sorted(entries):
+        if total <= budget:
+            break
+        in_use = os.path.isdir(os.path.join(path, "worktrees")) and os.listdir(os.path.join(path, "worktrees"))
+        if in_use or (keep and os.path.abspath(path) == os.path.abspath(keep)):
+            continue
+        with _mirror_lock(path):
+            shutil.rmtree(path, ignore_errors=True)
+        print(f"🧹 Evicted mirror {os.path.basename(path)}")
+        total -= size
+
+
+def files_not_checked_out(repo_path):
+    """[(path, size)] of tracked files that the sparse checkout left out of repo_path
+
+    Sizes are unknown without downloading the blobs, so they are reported as 0.
+    """
+    try:
+        if _git("-C", repo_path, "config", "--bool", "core.sparseCheckout") != "true":
+            return []
+        listed = _git("-C", repo_path, "ls-tree", "-r", "-z", "--name-only", "HEAD")
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return [(path, 0) for path in listed.split("\0")
+            if path and not os.path.lexists(os.path.join(repo_path, path))]
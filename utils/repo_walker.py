@@ -0,0 +1,144 @@
+import os
+import re
+from collections import deque, namedtuple
+
+DEFAULT_IGNORED_DIRS = {".git", "node_modules", "__pycache__", ".pytest_cache", ".mypy_cache",
+                        ".tox", ".venv", "venv"}
+# Extra directory names to prune, e.g. CODE_COMPASS_IGNORE_DIRS="vendor,third_party"
+IGNORED_DIRS = DEFAULT_IGNORED_DIRS | {
+    name.strip() for name in os.environ.get("CODE_COMPASS_IGNORE_DIRS", "").split(",") if name.strip()
+}
+BINARY_SAMPLE_SIZE = 8192
+
+WalkedFile = namedtuple("WalkedFile", ["path", "rel_path", "name", "directory", "size"])
+
+
+def is_binary_data(data):
+    """Git's heuristic: a NUL byte in the first few KB means binary"""
+    return b"\0" in data[:BINARY_SAMPLE_SIZE]
+
+
+def is_binary_file(path):
+    try:
+        with open(path, "rb") as f:
+            return is_binary_data(f.read(BINARY_SAMPLE_SIZE))
+    except OSError:
+        return False
+
+
+def _glob_to_regex(pattern):
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+def parse_gitignore(text, base):
+    """Rules (base, regex, negate, dir_only) for a .gitignore located in directory `base`"""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # Patterns containing a slash are relative to the .gitignore; others match at any depth
+        anchored = "/" in line
+        regex = _glob_to_regex(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append((base, re.compile(regex), negate, dir_only))
+    return rules
+
+
+def is_ignored(rel_path, is_dir, rules):
+    ignored = False
+    for base, regex, negate, dir_only in rules:
+        if base and not rel_path.startswith(base + "/"):
+            continue
+        if dir_only and not is_dir:
+            continue
+        if regex.fullmatch(rel_path[len(base) + 1:] if base else rel_path):
+            ignored = not negate
+    return ignored
+
+
+def walk_repository(root, extensions=None, max_size=None, ignored_dirs=None,
+                    use_gitignore=True, skip_binary=False, on_dir=None):
+    """Yield WalkedFile for every file under root in one breadth-first os.scandir pass
+
+    Ignored directories (deny-list and .gitignore) are pruned before descending, stat
+    results come from the directory entries, and files are yielded lazily. on_dir(rel_path)
+    is called for every directory that is kept.
+    """
+    ignored_dirs = IGNORED_DIRS if ignored_dirs is None else ignored_dirs
+    if extensions is not None:
+        extensions = tuple(ext.lower() for ext in extensions)
+    queue = deque([("", [])])
+
+    while queue:
+        current_dir, rules = queue.popleft()
+        dir_path = os.path.join(root, current_dir) if current_dir else root
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"⚠️ Error accessing {current_dir}: {e}")
+            continue
+
+        if use_gitignore:
+            for entry in entries:
+                if entry.name == ".gitignore" and entry.is_file():
+                    try:
+                        with open(entry.path, "r", encoding="utf-8", errors="ignore") as f:
+                            rules = rules + parse_gitignore(f.read(), current_dir)
+                    except OSError:
+                        pass
+                    break
+
+        for entry in entries:
+            rel_path = f"{current_dir}/{entry.name}" if current_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in ignored_dirs or (rules and is_ignored(rel_path, True, rules)):
+                        continue
+                    if on_dir:
+                        on_dir(rel_path)
+                    queue.append((rel_path, rules))
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.name in ignored_dirs:  # e.g. the .git file of a linked worktree
+                        continue
+                    if extensions is not None and not entry.name.lower().endswith(extensions):
+                        continue
+                    if rules and is_ignored(rel_path, False, rules):
+                        continue
+                    size = entry.stat(follow_symlinks=False).st_size
+                    if max_size is not None and size > max_size:
+                        continue
+                    if skip_binary and is_binary_file(entry.path):
+                        continue
+                    yield WalkedFile(entry.path, rel_path, entry.name, current_dir, size)
+            except OSError as e:
+                print(f"⚠️ Error reading {rel_path}: {e}")
@@ -0,0 +1,151 @@
+import gzip
+import json
+import math
+import os
+from collections import Counter, defaultdict
+from utils.embeddings import code_tokens
+
+LEXICAL_FILE = "lexical.json.gz"
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "6000"))
+CHARS_PER_TOKEN = 4
+RRF_K = 60
+
+
+class LexicalIndex:
+    """BM25 inverted index over chunk tokens, stored next to the FAISS index
+
+    Only per-chunk term counts are persisted; postings are rebuilt on load. Chunks are
+    added and removed by id, so incremental index updates keep it in sync.
+    """
+
+    def __init__(self, doc_terms=None, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = {}
+        self.doc_len = {}
+        self.postings = defaultdict(dict)
+        self.total_len = 0
+        for chunk_id, terms in (doc_terms or {}).items():
+            self._insert(chunk_id, terms)
+
+    def _insert(self, chunk_id, terms):
+        self.doc_terms[chunk_id] = terms
+        length = sum(terms.values())
+        self.doc_len[chunk_id] = length
+        self.total_len += length
+        for term, tf in terms.items():
+            self.postings[term][chunk_id] = tf
+
+    def add(self, chunk_id, text):
+        if chunk_id in self.doc_terms:
+            self.remove([chunk_id])
+        self._insert(chunk_id, dict(Counter(code_tokens(text))))
+
+    def remove(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            terms = self.doc_terms.pop(chunk_id, None)
+            if terms is None:
+                continue
+            self.total_len -= self.doc_len.pop(chunk_id)
+            for term in terms:
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(chunk_id, None)
+                    if not docs:
+                        del self.postings[term]
+
+    def search(self, query, k=30):
+        """[(chunk_id, bm25 score)] best first"""
+        n = len(self.doc_terms)
+        if not n:
+            return []
+        avg_len = self.total_len / n
+        scores = defaultdict(float)
+        for term in set(code_tokens(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for chunk_id, tf in docs.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[chunk_id] / avg_len)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, index_dir):
+        tmp_path = os.path.join(index_dir, LEXICAL_FILE + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(self.doc_terms, f)
+        os.replace(tmp_path, os.path.join(index_dir, LEXICAL_FILE))
+
+    @classmethod
+    def load(cls, index_dir):
+        path = os.path.join(index_dir, LEXICAL_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def _chunk_key(doc):
+    return getattr(doc, "id", None) or (doc.metadata.get("source"), doc.metadata.get("start_line"),
+                                         doc.page_content[:100])
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def hybrid_search(vectorstore, lexical, query, query_vector, k=10, fetch_k=30, mmr_lambda=0.7,
+                  token_budget=None):
+    """Dense + BM25 retrieval fused with reciprocal rank fusion, diversified with MMR
+
+    Returns up to k Documents whose combined text fits token_budget (approx. 4 chars per
+    token); the last chunk that would overflow the budget is trimmed instead of dropped.
+    """
+    token_budget = token_budget or CONTEXT_TOKEN_BUDGET
+    candidates = {}
+    fused = defaultdict(float)
+
+    for rank, (doc, _) in enumerate(vectorstore.similarity_search_with_score_by_vector(query_vector, k=fetch_k)):
+        key = _chunk_key(doc)
+        candidates[key] = doc
+        fused[key] += 1.0 / (RRF_K + rank)
+
+    if lexical is not None:
+        for rank, (chunk_id, _) in enumerate(lexical.search(query, k=fetch_k)):
+            doc = candidates.get(chunk_id) or vectorstore.docstore.search(chunk_id)
+            if doc is None or isinstance(doc, str):  # docstore returns a message for unknown ids
+                continue
+            candidates[chunk_id] = doc
+            fused[chunk_id] += 1.0 / (RRF_K + rank)
+
+    if not fused:
+        return []
+
+    top_score = max(fused.values())
+    token_sets = {key: set(code_tokens(doc.page_content)) for key, doc in candidates.items()}
+    remaining = set(fused)
+    selected = []
+    budget_chars = token_budget * CHARS_PER_TOKEN
+
+    while remaining and len(selected) < k and budget_chars > 0:
+        def mmr_score(key):
+            redundancy = max((_jaccard(token_sets[key], token_sets[chosen]) for chosen in selected), default=0.0)
+            return mmr_lambda * fused[key] / top_score - (1 - mmr_lambda) * redundancy
+
+        best = max(remaining, key=mmr_score)
+        remaining.discard(best)
+        selected.append(best)
+        budget_chars -= len(candidates[best].page_content)
+
+    docs = [candidates[key] for key in selected]
+    if budget_chars < 0 and docs:
+        last = docs[-1]
+        keep = len(last.page_content) + budget_chars
+        if keep <= 0:
+            docs.pop()
+        else:
+            docs[-1] = type(last)(page_content=last.page_content[:keep] + "\n...", metadata=last.metadata)
+    return docs
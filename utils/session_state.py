@@ -5,15 +5,13 @@ def initialize_session_state():
     session_vars = {
         'vectorstore': None,
         'repo_path': None,
-        'contribution_report': None,
-        'file_summaries': {},
-        'repo_summary': None,
+        'summary_job': None,
         'analyzer': None,
-        'files_data': None,
-        'repo_structure_data': None,
+        'analysis': None,
         'graph_data': None,
-        'file_dependencies_data': None,
+        'graph_focus': None,
         'repo_analyzed': False,
+        'llm_failures': {},
         'qa_history': []
     }
     
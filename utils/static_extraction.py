@@ -0,0 +1,124 @@
+import os
+import re
+import sys
+import heapq
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utils.disk_cache import DiskCache, content_hash
+from utils.dependency_extractors import EXTRACTORS, extract_python_dependencies_with_status
+
+# Bump when an extractor changes so memoized results are not reused
+EXTRACTOR_VERSION = "3"
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", "0")) or os.cpu_count() or 1
+# Below this much source the pool's startup and pickling cost more than they save
+PARALLEL_MIN_BYTES = int(os.environ.get("EXTRACT_PARALLEL_MIN_BYTES", "2000000"))
+BATCHES_PER_WORKER = 4
+
+# Registered in utils.dependency_extractors; workers get the same table when they import it
+STATIC_EXTRACTORS = EXTRACTORS
+
+# Languages with no static extractor; their dependencies come from the LLM only
+AI_ONLY_EXTENSIONS = {".rb", ".rs", ".php", ".c", ".h", ".cpp", ".hpp", ".cs", ".kt", ".swift", ".scala"}
+# Source files the AI dependency pass may look at in addition to what the extractors found
+CODE_EXTENSIONS = {".py", ".js", ".ts", ".jsx", ".tsx", ".go", ".java"}
+
+DYNAMIC_IMPORT_PATTERN = re.compile(r"\b(?:require|import)\s*\(\s*[^'\"\s)]")
+
+_pool = None
+_pool_lock = threading.Lock()
+_memo = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking the multi-threaded Streamlit server is not safe
+            _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _get_memo():
+    global _memo
+    if _memo is None:
+        _memo = DiskCache("static_dependencies")
+    return _memo
+
+
+def extract_one(file_ext, content, file_path):
+    """{"deps": dependencies, "parsed": False if a parser failed and the regex fallback was used}"""
+    if file_ext == ".py":
+        deps, parsed = extract_python_dependencies_with_status(content, file_path)
+        return {"deps": deps, "parsed": parsed}
+    return {"deps": STATIC_EXTRACTORS[file_ext](content, file_path), "parsed": True}
+
+
+def _extract_batch(batch):
+    """Worker entry point: [(key, ext, content, path)] -> [(key, record)]"""
+    return [(key, extract_one(file_ext, content, file_path)) for key, file_ext, content, file_path in batch]
+
+
+def _balanced_batches(items, count):
+    """Split items into `count` batches of similar total content size (largest first)"""
+    heap = [(0, i) for i in range(count)]
+    batches = [[] for _ in range(count)]
+    for item in sorted(items, key=lambda item: len(item[2]), reverse=True):
+        size, i = heapq.heappop(heap)
+        batches[i].append(item)
+        heapq.heappush(heap, (size + len(item[2]), i))
+    return [batch for batch in batches if batch]
+
+
+def extract_static_dependencies(files):
+    """Static dependencies for [(path, ext, content)], identical to calling the extractors serially
+
+    Results are memoized on disk by content hash. Uncached files run in-process when
+    there is little work, otherwise on a process pool in size-balanced batches.
+    Returns ({path: deps}, {paths that needed the regex fallback}); every path gets its
+    own copy of the result.
+    """
+    memo = _get_memo()
+    python_version = "%d.%d" % sys.version_info[:2]  # ast accepts different syntax per version
+    keys = [content_hash(EXTRACTOR_VERSION, python_version, file_ext, content) for _, file_ext, content in files]
+    known = {}
+    todo = {}
+    for key, (file_path, file_ext, content) in zip(keys, files):
+        if key in known or key in todo:
+            continue
+        cached = memo.get(key)
+        if cached is not None:
+            known[key] = cached
+        else:
+            todo[key] = (key, file_ext, content, file_path)
+
+    work = list(todo.values())
+    total_bytes = sum(len(item[2]) for item in work)
+    if EXTRACT_WORKERS > 1 and len(work) > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+        batches = _balanced_batches(work, EXTRACT_WORKERS * BATCHES_PER_WORKER)
+        computed = dict(record for batch in _get_pool().map(_extract_batch, batches) for record in batch)
+        print(f"⚙️ Extracted {len(work)} files in {len(batches)} batches on {EXTRACT_WORKERS} processes")
+    else:
+        computed = dict(_extract_batch(work))
+
+    for key, record in computed.items():
+        memo.set(key, record)
+    known.update(computed)
+
+    # Copy per path so in-place merges (e.g. AI results) never leak between identical files
+    dependencies = {file_path: {name: list(values) for name, values in known[key]["deps"].items()}
+                    for key, (file_path, _, _) in zip(keys, files)}
+    unparsed = {file_path for key, (file_path, _, _) in zip(keys, files) if not known[key]["parsed"]}
+    return dependencies, unparsed
+
+
+def needs_ai_review(file_ext, content, deps):
+    """Confidence heuristic: True when static results are likely incomplete for this file"""
+    if file_ext == ".py":
+        # Dynamic imports are invisible to the AST walk
+        return "importlib" in content or "__import__(" in content
+    # Regex extraction: non-literal require/import targets, or nothing found in real code
+    if file_ext in (".js", ".ts", ".jsx", ".tsx") and DYNAMIC_IMPORT_PATTERN.search(content):
+        return True
+    return len(content) > 500 and not deps.get("imports") and not deps.get("functions")
@@ -0,0 +1,55 @@
+import threading
+
+
+class FileSummaryJob:
+    """Produces file summaries on background threads while the UI keeps rendering
+
+    The dashboard submits the files it wants to show and reads `results` on each rerun.
+    Files the LLM could not summarize are remembered in `failed` and not resubmitted.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.results = {}
+        self.pending = set()
+        self.failed = set()
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        with self.lock:
+            return bool(self.pending)
+
+    def lookup(self, file_path, content):
+        """Summary from this job or the on-disk cache, without calling the LLM"""
+        with self.lock:
+            if file_path in self.results:
+                return self.results[file_path]
+        summary = self.analyzer.cached_file_summary(file_path, content)
+        if summary is not None:
+            with self.lock:
+                self.results[file_path] = summary
+        return summary
+
+    def submit(self, files):
+        """Queue [(path, content)] that have no summary yet; returns immediately"""
+        with self.lock:
+            new = [(path, content) for path, content in files
+                   if path not in self.results and path not in self.pending and path not in self.failed]
+            self.pending.update(path for path, _ in new)
+        if new:
+            threading.Thread(target=self._run, args=(new,), daemon=True).start()
+
+    def _store(self, file_path, summary):
+        with self.lock:
+            self.results[file_path] = summary
+
+    def _run(self, files):
+        try:
+            self.analyzer.summarize_files(files, on_result=self._store)
+        finally:
+            with self.lock:
+                for path, _ in files:
+                    self.pending.discard(path)
+                    if path not in self.results:
+                        self.failed.add(path)
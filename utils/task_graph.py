@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+STATUS_ICONS = {
+    "pending": "⏸️",
+    "running": "⏳",
+    "done": "✅",
+    "failed": "❌",
+    "skipped": "⏭️",
+}
+
+
+class Task:
+    """One stage of a TaskGraph; fn(task, *dependency results) runs on a worker thread"""
+
+    def __init__(self, name, fn, deps, label):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.label = label or name
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.detail = ""
+        self.output = []
+        self.started = None
+        self.finished = None
+
+    def report(self, detail):
+        """Update the status line shown for this task (safe to call from the worker)"""
+        self.detail = detail
+
+    def stream(self, chunks):
+        """Collect a token generator into task.output so partial text can be shown live"""
+        for chunk in chunks:
+            self.output.append(chunk)
+        return "".join(self.output)
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class TaskGraph:
+    """Runs named tasks on a thread pool as soon as their dependencies have finished
+
+    Tasks whose dependency failed or was skipped are skipped. Workers inherit the
+    Streamlit script context so st.* messages from analyzer code still render;
+    on_update is only ever called from the thread that called run().
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.tasks = {}
+
+    def add(self, name, fn, deps=(), label=None):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Unknown dependency '{dep}' for task '{name}'")
+        self.tasks[name] = Task(name, fn, deps, label)
+        return self.tasks[name]
+
+    def _execute(self, task, ctx):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return task.fn(task, *[self.tasks[dep].result for dep in task.deps])
+
+    def run(self, on_update=None, poll_interval=0.1):
+        """Run every task; returns {name: result} for the tasks that finished"""
+        ctx = get_script_run_ctx()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                for task in self.tasks.values():
+                    if task.status != "pending":
+                        continue
+                    dep_status = [self.tasks[dep].status for dep in task.deps]
+                    if any(status in ("failed", "skipped") for status in dep_status):
+                        task.status = "skipped"
+                    elif all(status == "done" for status in dep_status):
+                        task.status = "running"
+                        task.started = time.time()
+                        running[pool.submit(self._execute, task, ctx)] = task
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    task.finished = time.time()
+                    try:
+                        task.result = future.result()
+                        task.status = "done"
+                    except Exception as e:
+                        print(f"❌ Task '{task.name}' failed: {e}")
+                        task.error = e
+                        task.status = "failed"
+                if on_update:
+                    on_update(self)
+
+        if on_update:
+            on_update(self)
+        return {name: task.result for name, task in self.tasks.items() if task.status == "done"}
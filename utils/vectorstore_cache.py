@@ -0,0 +1,71 @@
+import os
+import threading
+from collections import OrderedDict
+from langchain_community.vectorstores import FAISS
+
+MAX_RESIDENT_INDEXES = int(os.environ.get("CODE_COMPASS_MAX_RESIDENT_INDEXES", "4"))
+
+# Process-level: shared by every Streamlit session in this server
+_cache = OrderedDict()  # (kind, index_dir) -> (version, loaded object)
+_cache_lock = threading.Lock()
+_load_locks = {}
+
+
+def _version(index_dir):
+    """Changes whenever the index files are rewritten"""
+    return tuple(os.path.getmtime(os.path.join(index_dir, name))
+                 for name in ("index.faiss", "index.pkl"))
+
+
+def _get_resident(kind, index_dir, loader):
+    key = (kind, os.path.abspath(index_dir))
+    version = _version(index_dir)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] == version:
+            _cache.move_to_end(key)
+            return entry[1]
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    # Per-index lock so concurrent first questions load the index only once
+    with load_lock:
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry and entry[0] == version:
+                return entry[1]
+        value = loader()
+        with _cache_lock:
+            _cache[key] = (version, value)
+            _cache.move_to_end(key)
+            # Two kinds per index (dense + lexical)
+            while len(_cache) > MAX_RESIDENT_INDEXES * 2:
+                _cache.popitem(last=False)
+        return value
+
+
+def get_vectorstore(index_dir, embedding_model):
+    """Loaded FAISS store for index_dir, deserialized from disk only once per index version
+
+    The store is shared between sessions, so callers should embed queries with their own
+    embedding model and search by vector instead of relying on the store's embedding function.
+    """
+    return _get_resident("faiss", index_dir, lambda: FAISS.load_local(
+        index_dir, embedding_model, allow_dangerous_deserialization=True))
+
+
+def get_lexical_index(index_dir):
+    """Resident BM25 index stored alongside the FAISS index"""
+    from utils.retrieval import LexicalIndex
+    return _get_resident("lexical", index_dir, lambda: LexicalIndex.load(index_dir))
+
+
+def invalidate(index_dir=None):
+    """Drop the resident copies of one index (or all of them) after a rebuild"""
+    with _cache_lock:
+        if index_dir is None:
+            _cache.clear()
+        else:
+            path = os.path.abspath(index_dir)
+            for key in [key for key in _cache if key[1] == path]:
+                del _cache[key]
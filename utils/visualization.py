@@ -1,159 +1,216 @@
 import streamlit as st
-import networkx as nx
 import plotly.express as px
 import pandas as pd
 import os
-from pyvis.network import Network
-from collections import defaultdict
+import json
+import math
+import threading
+from string import Template
+from collections import OrderedDict
+from utils.dependency_graph import graph_hash
+from utils.layout import compute_layout
+from utils.graph_metrics import get_graph_metrics
 
-def create_enhanced_visualization(graph, layout_type="spring"):
-    """Create interactive network visualization"""
-    if len(graph.nodes()) == 0:
-        return "<div>No connections found with current filters</div>"
+# Live physics freezes the browser on big graphs, so it is only offered below this size
+PHYSICS_MAX_NODES = int(os.environ.get("PHYSICS_MAX_NODES", "300"))
+MAX_CACHED_PAYLOADS = 32
+# vis-network is served once by Streamlit's static file server (see .streamlit/config.toml)
+VIS_ASSETS_URL = os.environ.get("VIS_ASSETS_URL", "app/static/vis-9.1.2")
+VIS_CDN_URL = "https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist"
+
+FILE_COLORS = {
+    ".py": "#3572A5", ".js": "#F7DF1E", ".ts": "#3178C6",
+    ".html": "#E34C26", ".css": "#563D7C", ".json": "#40A832",
+    ".md": "#083FA1", ".txt": "#CCCCCC", ".xml": "#FF9900",
+    ".yml": "#808080", ".yaml": "#808080", ".jsx": "#61DAFB",
+    ".tsx": "#61DAFB", ".vue": "#4FC08D", ".php": "#777BB4",
+    ".java": "#ED8B00", ".cpp": "#00599C", ".c": "#A8B9CC"
+}
+
+GRAPH_TEMPLATE = Template("""<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="$assets/vis-network.css">
+<script src="$assets/vis-network.min.js"></script>
+<script>
+  // Fall back to the CDN when static serving is not enabled
+  window.vis || document.write('<link rel="stylesheet" href="$cdn/dist/vis-network.min.css"><script src="$cdn/vis-network.min.js"><\\/script>');
+</script>
+<style>
+  body { margin: 0; }
+  #mynetwork { width: 100%; height: $height; background-color: $background; border: 1px solid lightgray; }
+</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<script type="text/javascript">
+  var nodes = new vis.DataSet($nodes);
+  var edges = new vis.DataSet($edges);
+  var network = new vis.Network(document.getElementById("mynetwork"), {nodes: nodes, edges: edges}, $options);
+</script>
+</body>
+</html>
+""")
+
+# Serialized graphs keyed by (graph hash, cache_key, layout, physics); shared by every session
+_payload_cache = OrderedDict()
+_payload_lock = threading.Lock()
+
+def _node_style(graph, node_id, data):
+    if data.get("node_type") == "directory":
+        return "#FFD700", 25, "box"
+    if data.get("node_type") == "aggregate":
+        return "#FFD700", min(20 + data["file_count"] ** 0.5 * 2, 45), "box"
+    return FILE_COLORS.get(data.get("file_type", ""), "#888888"), min(15 + graph.degree(node_id) * 2, 35), "dot"
+
+def _edge_style(edge_type):
+    if "function" in edge_type:
+        return "#FF4444", 3, edge_type.replace("calls_function_", "calls: ")
+    elif edge_type == "imports":
+        return "#4444FF", 2, "imports"
+    elif "link" in edge_type:
+        return "#44FF44", 1, edge_type.replace("_", " ")
+    elif edge_type == "contains":
+        return "#CCCCCC", 1, "contains"
+    return "#888888", 1, edge_type
+
+def _script_json(value):
+    # Keep "</script>" inside file names from closing the script tag
+    return json.dumps(value).replace("</", "<\\/")
+
+def _graph_payload(graph, layout_type, physics):
+    """Serialized vis-network nodes, edges and options for a graph"""
+    pos = compute_layout(graph, layout_type)
+    # Spread the unit-square layout so node density stays readable as the graph grows
+    spread = max(400.0, 40.0 * len(pos) ** 0.5)
+    physics = physics and len(pos) <= PHYSICS_MAX_NODES
     
-    if layout_type == "spring":
-        pos = nx.spring_layout(graph, k=1, iterations=50)
-    elif layout_type == "kamada_kawai":
-        pos = nx.kamada_kawai_layout(graph)
-    elif layout_type == "circular":
-        pos = nx.circular_layout(graph)
-    elif layout_type == "shell":
-        pos = nx.shell_layout(graph)
-    else:
-        pos = nx.random_layout(graph)
+    nodes = []
+    for node_id, data in graph.nodes(data=True):
+        color, size, shape = _node_style(graph, node_id, data)
+        title = f"{node_id}\nConnections: {graph.degree(node_id)}"
+        if data.get("file_count"):
+            title += f"\nFiles: {data['file_count']}"
+        if data.get("size"):
+            title += f"\nSize: {data['size']} bytes"
+        x, y = pos[node_id]
+        nodes.append({
+            "id": node_id,
+            "label": os.path.basename(node_id) if not node_id.startswith(("📁", "📦")) else node_id,
+            "color": color, "size": size, "shape": shape, "title": title,
+            "x": round(x * spread, 1), "y": round(y * spread, 1), "physics": physics
+        })
     
-    net = Network(height="800px", width="100%", bgcolor="#1e1e1e", 
-                  font_color="white", directed=True, notebook=True)
+    edges = []
+    for source, target, data in graph.edges(data=True):
+        color, width, label = _edge_style(data.get("edge_type", "connected"))
+        count = data.get("count", 1)
+        if count > 1:
+            # Aggregated edge: one line standing for `count` file-level edges
+            width += math.log2(count)
+            label = f"{count} × {label}"
+        edges.append({
+            "from": source, "to": target, "color": color, "width": width,
+            "title": label, "label": label if len(label) < 15 else "", "arrows": "to"
+        })
     
-    net.set_options("""
-    var options = {
-      "physics": {
-        "enabled": true,
-        "stabilization": {"iterations": 100},
-        "barnesHut": {
-          "gravitationalConstant": -8000,
-          "centralGravity": 0.3,
-          "springLength": 95,
-          "springConstant": 0.04,
-          "damping": 0.09
+    options = {
+        "physics": {
+            "enabled": physics,
+            "stabilization": {"iterations": 100},
+            "barnesHut": {
+                "gravitationalConstant": -8000,
+                "centralGravity": 0.3,
+                "springLength": 95,
+                "springConstant": 0.04,
+                "damping": 0.09
+            }
+        },
+        "nodes": {"font": {"color": "white"}},
+        "edges": {"smooth": physics},
+        "interaction": {
+            "dragNodes": True,
+            "dragView": True,
+            "zoomView": True,
+            "hideEdgesOnDrag": not physics
         }
-      },
-      "interaction": {
-        "dragNodes": true,
-        "dragView": true,
-        "zoomView": true
-      }
     }
-    """)
-    
-    for node in graph.nodes(data=True):
-        node_id, data = node
-        
-        if data.get("node_type") == "directory":
-            color = "#FFD700"
-            size = 25
-            shape = "box"
-        else:
-            file_ext = data.get("file_type", "")
-            color_map = {
-                ".py": "#3572A5", ".js": "#F7DF1E", ".ts": "#3178C6",
-                ".html": "#E34C26", ".css": "#563D7C", ".json": "#40A832",
-                ".md": "#083FA1", ".txt": "#CCCCCC", ".xml": "#FF9900",
-                ".yml": "#808080", ".yaml": "#808080", ".jsx": "#61DAFB",
-                ".tsx": "#61DAFB", ".vue": "#4FC08D", ".php": "#777BB4",
-                ".java": "#ED8B00", ".cpp": "#00599C", ".c": "#A8B9CC"
-            }
-            color = color_map.get(file_ext, "#888888")
-            size = min(15 + graph.degree(node_id) * 2, 35)
-            shape = "dot"
-        
-        label = os.path.basename(node_id) if not node_id.startswith("📁") else node_id
-        title = f"{node_id}<br>Connections: {graph.degree(node_id)}"
-        if data.get("size"):
-            title += f"<br>Size: {data['size']} bytes"
-        
-        net.add_node(node_id, label=label, color=color, size=size, 
-                    title=title, shape=shape)
-    
-    for edge in graph.edges(data=True):
-        source, target, data = edge
-        edge_type = data.get("edge_type", "connected")
-        
-        if "function" in edge_type:
-            color = "#FF4444"
-            width = 3
-            label = edge_type.replace("calls_function_", "calls: ")
-        elif edge_type == "imports":
-            color = "#4444FF"
-            width = 2
-            label = "imports"
-        elif "link" in edge_type:
-            color = "#44FF44"
-            width = 1
-            label = edge_type.replace("_", " ")
-        elif edge_type == "contains":
-            color = "#CCCCCC"
-            width = 1
-            label = "contains"
-        else:
-            color = "#888888"
-            width = 1
-            label = edge_type
-        
-        net.add_edge(source, target, color=color, width=width, 
-                    title=label, label=label if len(label) < 15 else "",
-                    arrows="to")
+    return _script_json(nodes), _script_json(edges), _script_json(options)
+
+def create_enhanced_visualization(graph, layout_type="spring", physics=False, cache_key=None):
+    """Create interactive network visualization
     
-    html_file = "enhanced_network.html"
-    net.save_graph(html_file)
+    The HTML is built in memory; node positions come from the server-side layout, and with
+    cache_key (e.g. the filter options) the serialized graph is reused across reruns. The
+    key always includes the graph's own hash, so a rebuilt graph is never served stale.
+    """
+    if len(graph.nodes()) == 0:
+        return "<div>No connections found with current filters</div>"
     
-    with open(html_file, "r", encoding="utf-8") as f:
-        html_content = f.read()
+    key = (graph_hash(graph), cache_key, layout_type, bool(physics)) if cache_key is not None else None
+    with _payload_lock:
+        payload = _payload_cache.get(key) if key else None
+        if payload:
+            _payload_cache.move_to_end(key)
+    if payload is None:
+        payload = _graph_payload(graph, layout_type, physics)
+        if key:
+            with _payload_lock:
+                _payload_cache[key] = payload
+                while len(_payload_cache) > MAX_CACHED_PAYLOADS:
+                    _payload_cache.popitem(last=False)
     
-    return html_content
+    nodes_json, edges_json, options_json = payload
+    return GRAPH_TEMPLATE.substitute(assets=VIS_ASSETS_URL, cdn=VIS_CDN_URL, height="800px", background="#1e1e1e",
+                                     nodes=nodes_json, edges=edges_json, options=options_json)
 
 def create_statistics_dashboard(graph, file_dependencies):
     """Create statistics dashboard for the repository"""
+    metrics = get_graph_metrics(graph)
     st.subheader("📊 Repository Statistics")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Files", len([n for n in graph.nodes() if not n.startswith("📁")]))
+        st.metric("Total Files", metrics.file_count)
     with col2:
-        st.metric("Total Connections", len(graph.edges()))
+        st.metric("Total Connections", metrics.total_edges)
     with col3:
-        st.metric("Connected Files", len([n for n in graph.nodes() if graph.degree(n) > 0]))
+        st.metric("Connected Files", metrics.connected_nodes)
     with col4:
-        avg_degree = sum(dict(graph.degree()).values()) / len(graph.nodes()) if graph.nodes() else 0
-        st.metric("Avg Connections/File", f"{avg_degree:.1f}")
-    
-    file_types = defaultdict(int)
-    for node in graph.nodes(data=True):
-        if not node[0].startswith("📁"):
-            ext = os.path.splitext(node[0])[1] or "no extension"
-            file_types[ext] += 1
+        st.metric("Avg Connections/File", f"{metrics.avg_degree:.1f}")
     
-    if file_types:
+    if len(metrics.file_types):
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📂 File Type Distribution")
-            df_types = pd.DataFrame(list(file_types.items()), columns=["Extension", "Count"])
-            fig_pie = px.pie(df_types, values="Count", names="Extension", 
-                           title="File Types in Repository")
+            fig_pie = metrics.figure("file_types", lambda: px.pie(
+                pd.DataFrame({"Extension": metrics.file_types.index, "Count": metrics.file_types.to_numpy()}),
+                values="Count", names="Extension", title="File Types in Repository"))
             st.plotly_chart(fig_pie, use_container_width=True)
         
         with col2:
             st.subheader("🔗 Most Connected Files")
-            degrees = [(node, degree) for node, degree in graph.degree() 
-                      if not node.startswith("📁")]
-            degrees.sort(key=lambda x: x[1], reverse=True)
-            
-            top_files = degrees[:10]
-            if top_files:
-                df_connected = pd.DataFrame(top_files, columns=["File", "Connections"])
-                df_connected["File"] = df_connected["File"].apply(os.path.basename)
-                fig_bar = px.bar(df_connected, x="Connections", y="File", 
-                               orientation="h", title="Top Connected Files")
-                st.plotly_chart(fig_bar, use_container_width=True)
\ No newline at end of file
+            top_files = metrics.top_files("degree")
+            if len(top_files):
+                fig_bar = metrics.figure("most_connected", lambda: px.bar(
+                    pd.DataFrame({"File": top_files.index.map(os.path.basename), "Connections": top_files["degree"]}),
+                    x="Connections", y="File", orientation="h", title="Top Connected Files"))
+                st.plotly_chart(fig_bar, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("🏆 Hub Files")
+        hubs = metrics.top_files("pagerank")
+        st.dataframe(hubs[["in_degree", "out_degree", "pagerank", "betweenness"]].rename(columns={
+            "in_degree": "Used by", "out_degree": "Uses", "pagerank": "PageRank", "betweenness": "Betweenness"
+        }), use_container_width=True)
+    
+    with col2:
+        st.subheader("🔁 Dependency Cycles")
+        st.metric("Files in cycles", metrics.cyclic_files, help=f"{metrics.cycle_count} cycle groups, "
+                                                                 f"{metrics.components} connected components")
+        for cycle in metrics.cycles:
+            st.write(" → ".join(os.path.basename(node) for node in cycle))